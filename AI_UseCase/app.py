@@ -1,11 +1,16 @@
 import streamlit as st
 import os
+import re
 import sys
+from collections import Counter
 
 # Fix import path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
 
-from utils.rag import process_pdfs, get_rag_answer
+from config.config import ML_WARMUP, DEFAULT_KB_NAME, ADMIN_PAGE_SIZE, LLM_MODE
+from models.embeddings import start_background_warm_up, get_load_report
+from utils.rag import process_pdfs, sync_documents, get_rag_answer, generate_rag_answer
+from utils.kb_registry import registry, get_knowledge_base
 from utils.booking import (
     init_db,
     init_booking,
@@ -14,12 +19,24 @@ from utils.booking import (
     save_booking,
     get_bookings_by_email
 )
-from utils.intent import detect_intent, is_question
-from utils.emailer import send_confirmation_email
+from utils.intent import detect_intent, is_question, classify_intent, LOOKUP, BOOK, HOURS
+from utils.availability import (
+    parse_day,
+    is_slot_query,
+    describe_free_slots,
+    SlotUnavailableError
+)
+from utils.outbox import start_outbox_worker
+from utils.export import export_bookings, EXPORT_FORMATS
+from utils.answer_cache import answer_cache
+from utils.metrics import metrics, turn, annotate, prometheus_text, start_metrics_server
 from utils.admin import (
-    get_all_bookings,
+    get_bookings_page,
+    count_bookings,
+    get_booking_services,
     cancel_booking,
-    update_booking_status
+    update_booking_status,
+    bulk_update_status
 )
 
 USER_AVATAR = "👤"
@@ -53,11 +70,28 @@ def chat_page():
         accept_multiple_files=True
     )
 
-    if uploaded_files and "rag_data" not in st.session_state:
-        with st.spinner("Processing PDFs..."):
-            st.session_state.rag_data = process_pdfs(uploaded_files)
+    # The session only keeps a key; the knowledge base itself is shared
+    rag_data = get_knowledge_base(st.session_state.get("kb_key"))
+
+    if uploaded_files and rag_data is None:
+        with st.spinner("Processing PDFs..."), turn("upload"):
+            rag_data = process_pdfs(uploaded_files)
+        st.session_state.kb_key = rag_data["cache_key"]
         st.success("✅ PDFs processed successfully")
 
+    elif uploaded_files:
+        # Added, revised or removed PDFs: only the changed documents are re-indexed
+        with st.spinner("Updating knowledge base..."), turn("upload"):
+            updated = sync_documents(rag_data, uploaded_files)
+        if updated is not rag_data:
+            rag_data = updated
+            st.session_state.kb_key = rag_data["cache_key"]
+            st.success("✅ Knowledge base updated")
+
+    if rag_data is None:
+        # No uploads in this session: use the clinic documents published by the admin
+        rag_data = get_knowledge_base(DEFAULT_KB_NAME)
+
     if "messages" not in st.session_state:
         st.session_state.messages = []
 
@@ -72,11 +106,16 @@ def chat_page():
         with st.chat_message("user", avatar=USER_AVATAR):
             st.markdown(prompt)
 
-        with st.chat_message("assistant", avatar=BOT_AVATAR):
+        # The turn also covers streaming, which runs after the spinner closes
+        with st.chat_message("assistant", avatar=BOT_AVATAR), turn("chat"):
+            # Set when the answer is generated token by token
+            stream = None
+
             with st.spinner("🤖 Thinking..."):
 
                 # -------- BOOKING RETRIEVAL --------
                 if "awaiting_email_lookup" in st.session_state:
+                    annotate(branch="email_lookup")
                     bookings = get_bookings_by_email(prompt)
                     del st.session_state.awaiting_email_lookup
 
@@ -87,44 +126,50 @@ def chat_page():
                     else:
                         response = "❌ No bookings found for this email."
 
-                elif any(x in prompt.lower() for x in ["my booking", "my appointment"]):
+                elif classify_intent(prompt) == LOOKUP:
+                    annotate(branch="lookup_prompt")
                     st.session_state.awaiting_email_lookup = True
                     response = "📧 Please enter your email to retrieve your bookings."
 
                 # -------- BOOKING MODE --------
                 elif "booking" in st.session_state:
+                    annotate(branch="booking")
 
                     if prompt.lower() == "yes":
-                        booking_id = save_booking(st.session_state.booking)
-
-                        email_sent = send_confirmation_email(
-                            st.session_state.booking["email"],
-                            st.session_state.booking["name"],
-                            booking_id,
-                            st.session_state.booking["service"],
-                            st.session_state.booking["date"],
-                            st.session_state.booking["time"]
-                        )
+                        # The confirmation email is queued with the booking and
+                        # sent by the outbox worker, so the reply does not wait on SMTP
+                        b = st.session_state.booking
+
+                        try:
+                            booking_id = save_booking(b)
+
+                        except SlotUnavailableError:
+                            # Another patient took the slot since it was checked: pick again
+                            day = parse_day(b["date"])
+                            b.pop("time")
+                            response = (
+                                "⚠️ Sorry, that time was just booked by someone else.\n\n"
+                                + describe_free_slots(day, b["service"])
+                                + "\n\n➡️ " + next_question(b)
+                            )
 
-                        response = (
-                            "✅ **Appointment confirmed!**\n\n"
-                            f"📌 Booking ID: `{booking_id}`\n\n"
-                        )
-
-                        response += (
-                            "📧 Confirmation email sent."
-                            if email_sent
-                            else "⚠️ Booking saved, email could not be sent."
-                        )
-
-                        del st.session_state.booking
+                        else:
+                            if booking_id:
+                                response = (
+                                    "✅ **Appointment confirmed!**\n\n"
+                                    f"📌 Booking ID: `{booking_id}`\n\n"
+                                    "📧 A confirmation email is on its way."
+                                )
+                            else:
+                                response = "⚠️ Booking could not be saved. Please try again."
+                            del st.session_state.booking
 
                     elif prompt.lower() == "no":
                         response = "❌ Booking cancelled."
                         del st.session_state.booking
 
-                    elif is_question(prompt) and "rag_data" in st.session_state:
-                        info = get_rag_answer(prompt, st.session_state.rag_data)
+                    elif is_question(prompt) and rag_data is not None:
+                        info = get_rag_answer(prompt, rag_data)
                         response = info + "\n\n➡️ " + next_question(st.session_state.booking)
 
                     else:
@@ -151,8 +196,17 @@ def chat_page():
                                     "Type **YES** to confirm or **NO** to cancel."
                                 )
 
+                # -------- FREE SLOTS --------
+                elif (
+                    is_slot_query(prompt) and parse_day(prompt)
+                    and classify_intent(prompt) not in (BOOK, HOURS)
+                ):
+                    annotate(branch="free_slots")
+                    response = describe_free_slots(parse_day(prompt))
+
                 # -------- START BOOKING --------
                 elif detect_intent(prompt) == "booking":
+                    annotate(branch="start_booking")
                     st.session_state.booking = init_booking()
                     response = (
                         "📝 Let’s start booking your appointment.\n\n"
@@ -161,12 +215,21 @@ def chat_page():
 
                 # -------- GENERAL RAG --------
                 else:
-                    if "rag_data" in st.session_state:
-                        response = get_rag_answer(prompt, st.session_state.rag_data)
-                    else:
+                    annotate(branch="rag")
+                    if rag_data is None:
                         response = "📄 Please upload clinic PDFs first."
+                    else:
+                        if st.session_state.get("generative_answers"):
+                            stream = generate_rag_answer(prompt, rag_data)
+                        if stream is None:
+                            response = get_rag_answer(prompt, rag_data)
+
+                if stream is None:
+                    st.markdown(response)
 
-                st.markdown(response)
+            if stream is not None:
+                # Outside the spinner so the first tokens show as soon as they arrive
+                response = st.write_stream(stream)
 
         st.session_state.messages.append({"role": "assistant", "content": response})
 
@@ -175,13 +238,55 @@ def chat_page():
 def admin_page():
     st.title("📊 Admin Dashboard")
 
-    df = get_all_bookings()
+    # -------- FILTERS --------
+    f1, f2, f3, f4, f5 = st.columns(5)
+    with f1:
+        status_filter = st.selectbox("Status", ["All", "CONFIRMED", "CANCELLED"])
+    with f2:
+        service_filter = st.selectbox("Service", ["All"] + get_booking_services())
+    with f3:
+        date_from = st.date_input("From", value=None)
+    with f4:
+        date_to = st.date_input("To", value=None)
+    with f5:
+        customer_filter = st.text_input("Customer name / email")
+
+    filters = {
+        "status": None if status_filter == "All" else status_filter,
+        "service": None if service_filter == "All" else service_filter,
+        "date_from": date_from.isoformat() if date_from else None,
+        "date_to": date_to.isoformat() if date_to else None,
+        "customer": customer_filter.strip() or None,
+    }
+
+    # Cursors of the pages visited so far; start over whenever the filters change
+    if st.session_state.get("admin_filters") != filters:
+        st.session_state.admin_filters = filters
+        st.session_state.admin_cursors = [None]
+
+    cursors = st.session_state.admin_cursors
+    total = count_bookings(filters)
+    df, next_cursor = get_bookings_page(filters, after=cursors[-1])
 
     if df.empty:
-        st.info("No bookings available yet.")
+        st.info("No bookings available yet." if total == 0 and not any(filters.values())
+                else "No bookings match these filters.")
     else:
         st.dataframe(df, use_container_width=True)
 
+    pages = max(1, -(-total // ADMIN_PAGE_SIZE))
+    p1, p2, p3 = st.columns([1, 1, 4])
+    with p1:
+        if st.button("⬅️ Previous", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with p2:
+        if st.button("Next ➡️", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+    with p3:
+        st.caption(f"Page {len(cursors)} of {pages} · {total} booking(s)")
+
     st.divider()
     st.markdown("### ✏️ Update / Cancel Booking")
 
@@ -214,17 +319,109 @@ def admin_page():
             else:
                 st.warning("Please enter a Booking ID")
 
+    st.divider()
+    st.markdown("### 🗂️ Bulk Update")
+    st.caption("Paste booking IDs, or apply to every booking matching the filters above.")
+
+    if "bulk_result" in st.session_state:
+        results = st.session_state.pop("bulk_result")
+        counts = Counter(results.values())
+        st.success(", ".join(f"{n} {label}" for label, n in counts.items()) or "No bookings matched.")
+        st.dataframe(
+            [{"booking_id": booking_id, "result": result} for booking_id, result in results.items()],
+            use_container_width=True
+        )
+
+    bulk_ids = st.text_area("Booking IDs (comma or newline separated)")
+    use_filters = st.checkbox("Use the dashboard filters instead of IDs")
+    bulk_status = st.selectbox("New Status", ["CANCELLED", "CONFIRMED"], key="bulk_status")
+
+    if st.button("🗂️ Apply to All"):
+        ids = [i for i in re.split(r"[\s,;]+", bulk_ids) if i]
+
+        if use_filters and not any(filters.values()):
+            st.warning("Set at least one filter (date, service, ...) first")
+        elif not use_filters and not ids:
+            st.warning("Please enter at least one Booking ID")
+        else:
+            results = bulk_update_status(
+                bulk_status,
+                booking_ids=None if use_filters else ids,
+                filters=filters if use_filters else None
+            )
+            if results is None:
+                st.error("Bulk update failed. No bookings were changed.")
+            else:
+                # One rerun for the whole batch; the summary survives it
+                st.session_state.bulk_result = results
+                st.rerun()
+
     st.divider()
     st.markdown("### 📥 Export Bookings")
 
-    if not df.empty:
-        csv = df.to_csv(index=False).encode("utf-8")
-        st.download_button("⬇️ Download CSV", csv, "appointments.csv", "text/csv")
+    st.caption("Exports the bookings matching the filters above, including the date range.")
+    export_format = st.radio("Format", ["csv", "parquet"], horizontal=True)
+
+    # Rows are streamed to a temporary file in batches, then served from disk
+    if total and st.button("📄 Prepare Export"):
+        path, count = export_bookings(export_format, filters)
+        try:
+            mime, suffix = EXPORT_FORMATS[export_format]
+            with open(path, "rb") as f:
+                st.download_button(f"⬇️ Download {count} bookings", f, "appointments" + suffix, mime)
+        finally:
+            os.remove(path)
+
+    st.divider()
+    st.markdown("### 📚 Clinic Knowledge Base")
+    st.caption("Used by every chat session that has not uploaded its own PDFs.")
+
+    current = registry.alias_key(DEFAULT_KB_NAME)
+    st.write(f"Current version: `{current[:12]}`" if current else "No clinic documents published yet.")
+
+    kb_files = st.file_uploader(
+        "Clinic PDFs to publish",
+        type=["pdf"],
+        accept_multiple_files=True,
+        key="admin_kb_files"
+    )
+
+    if st.button("📤 Publish Knowledge Base"):
+        if kb_files:
+            with st.spinner("Processing PDFs..."):
+                registry.set_alias(DEFAULT_KB_NAME, process_pdfs(kb_files))
+            st.success("Knowledge base published to all sessions.")
+        else:
+            st.warning("Please upload at least one PDF")
+
+    st.divider()
+    st.markdown("### 📈 Performance")
+    st.caption("Time per stage since this server started.")
+
+    answers = answer_cache.stats()
+    st.caption(f"Answer cache: {answers['entries']} entries, {answers['hits']} hits, "
+               f"{answers['misses']} misses ({answers['hit_rate']:.0%} hit rate)")
+
+    stages = metrics.snapshot()
+    if stages:
+        st.dataframe(stages, use_container_width=True)
+    else:
+        st.info("No activity recorded yet.")
+
+    with st.expander("Prometheus metrics"):
+        text = prometheus_text()
+        st.code(text, language="text")
+        st.download_button("⬇️ Download metrics", text, "metrics.prom", "text/plain")
 
 
 # ---------------- MAIN ----------------
 def main():
     init_db()
+    start_outbox_worker()
+    start_metrics_server()
+
+    if ML_WARMUP:
+        start_background_warm_up()
 
     st.set_page_config(
         page_title="Doctor Appointment AI Assistant",
@@ -238,6 +435,20 @@ def main():
             st.session_state.clear()
             st.rerun()
 
+        report = get_load_report()
+        if report["components"]:
+            st.caption(f"🧠 ML stack loaded in {report['total_seconds']:.1f}s "
+                       f"(budget {report['budget_seconds']:.0f}s per component)")
+        else:
+            st.caption("🧠 ML stack not loaded yet")
+
+        st.toggle(
+            "✨ Generative answers",
+            value=LLM_MODE == "generate",
+            key="generative_answers",
+            help="Answer document questions with the LLM, grounded on the uploaded PDFs"
+        )
+
     if page == "Chat":
         chat_page()
     elif page == "Admin":
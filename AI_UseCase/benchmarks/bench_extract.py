@@ -0,0 +1,84 @@
+"""PDF text extraction benchmark.
+
+Compares the old path (copy each upload to a temp file, extract pages one by
+one) with the in-memory, process-pool path in utils.rag on the bundled
+sample_pdfs. The samples are one page each, so their pages are repeated into
+a larger document (--pages) to model a real clinic manual.
+
+    python benchmarks/bench_extract.py --pages 200 --workers 4
+"""
+import os
+import io
+import sys
+import glob
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pypdf import PdfReader, PdfWriter
+
+from utils.rag import extract_pages
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), "..", "sample_pdfs")
+
+
+def build_document(pages):
+    samples = [PdfReader(path) for path in sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.pdf")))]
+    source = [page for reader in samples for page in reader.pages]
+
+    writer = PdfWriter()
+    for i in range(pages):
+        writer.add_page(source[i % len(source)])
+
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def extract_with_tempfile(data):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+        tmp.write(data)
+        path = tmp.name
+
+    try:
+        return [page.extract_text() or "" for page in PdfReader(path).pages]
+    finally:
+        os.remove(path)
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = build_document(args.pages)
+    print(f"document: {args.pages} pages, {len(data) / 1024:.0f} KiB")
+
+    baseline, expected = best_of(lambda: extract_with_tempfile(data), args.repeat)
+    print(f"tempfile, sequential : {baseline:.3f}s")
+
+    in_memory, result = best_of(lambda: extract_pages(data, workers=1), args.repeat)
+    assert result == expected
+    print(f"in-memory, sequential: {in_memory:.3f}s ({baseline / in_memory:.2f}x)")
+
+    # Each call starts (spawns) its own pool, so that cost is part of the timing
+    parallel, result = best_of(lambda: extract_pages(data, workers=args.workers), args.repeat)
+    assert result == expected
+    print(f"in-memory, {args.workers} workers : {parallel:.3f}s ({baseline / parallel:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
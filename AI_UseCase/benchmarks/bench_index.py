@@ -0,0 +1,47 @@
+"""Vector index recall vs latency benchmark.
+
+Builds every index mode in utils.vector_index over synthetic, clustered
+unit vectors shaped like all-MiniLM-L6-v2 embeddings (384 dims) and reports
+recall@k against the exact flat index, search latency, build time and size.
+
+    python benchmarks/bench_index.py --vectors 100000 --queries 1000
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from utils.vector_index import INDEX_MODES, choose_index_mode, evaluate_index_modes, format_report
+
+
+def synthetic_embeddings(n, dim, clusters, seed):
+    # Chunks of the same document section sit close together, like real embeddings
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.35 * rng.normal(size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype("float32")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=INDEX_MODES, choices=INDEX_MODES)
+    args = parser.parse_args()
+
+    data = synthetic_embeddings(args.vectors + args.queries, args.dim, 200, seed=0)
+    vectors, queries = data[:args.vectors], data[args.vectors:]
+
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, k={args.k}")
+    print(f"auto mode at this size: {choose_index_mode(args.vectors)}\n")
+    print(format_report(evaluate_index_modes(vectors, queries, args.k, args.modes)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Intent routing accuracy and latency.
+
+Scores the old substring rules, the keyword pattern and the embedding
+router on a labelled set of chat messages, and times router cache hits
+and misses. With --model real the configured MiniLM model is loaded
+from the local cache; the default hashing stand-in keeps the run offline
+but says little about embedding accuracy.
+
+    python benchmarks/bench_intent.py --model real
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+LABELLED = [
+    ("I'd like to book an appointment", "book"),
+    ("can I see a doctor on friday", "book"),
+    ("schedule me with the cardiologist", "book"),
+    ("I need a consultation for my skin", "book"),
+    ("please make a reservation for monday morning", "book"),
+    ("get me an appointment with dr sharma", "book"),
+    ("show me my bookings", "lookup"),
+    ("what appointments do I have coming up", "lookup"),
+    ("check the status of my appointment", "lookup"),
+    ("did my booking get confirmed", "lookup"),
+    ("cancel my appointment please", "cancel"),
+    ("I won't be able to come, cancel it", "cancel"),
+    ("call off my booking for tomorrow", "cancel"),
+    ("what services do you provide", "services"),
+    ("do you treat diabetes", "services"),
+    ("which treatments are offered here", "services"),
+    ("is blood pressure monitoring available", "services"),
+    ("who are the doctors", "doctors"),
+    ("is there a dermatologist", "doctors"),
+    ("tell me about dr mehta", "doctors"),
+    ("which doctor is available in the afternoon", "doctors"),
+    ("what time do you open", "hours"),
+    ("are you open on sundays", "hours"),
+    ("what are the clinic timings", "hours"),
+    ("until when are you open today", "hours"),
+    ("where are you located", "address"),
+    ("what's the clinic address", "address"),
+    ("how do I reach the clinic", "address"),
+    ("hi there", "other"),
+    ("thanks a lot", "other"),
+    ("Howard Wilson", "other"),
+    ("howard@example.com", "other"),
+    ("9876543210", "other"),
+    ("2030-01-02", "other"),
+    ("10 AM", "other"),
+    ("yes", "other"),
+    ("I visited last week and it was great", "other"),
+    ("Skin Treatment", "other"),
+]
+
+
+# The substring rules this router replaced, as the baseline
+def legacy_detect_intent(text):
+    text = text.lower()
+    for word in ["book", "appointment", "schedule", "consult", "visit"]:
+        if word in text:
+            return "booking"
+    return "general"
+
+
+def legacy_is_question(text):
+    text = text.lower()
+    question_words = [
+        "what", "which", "how", "when", "where",
+        "services", "timing", "hours", "address", "doctors"
+    ]
+    return "?" in text or any(w in text for w in question_words)
+
+
+def accuracy(predict, expected):
+    hits = sum(1 for (text, label) in LABELLED if predict(text) == expected(label))
+    return hits / len(LABELLED)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", choices=["hashing", "real"], default="hashing")
+    parser.add_argument("--repeat", type=int, default=10_000)
+    args = parser.parse_args()
+
+    os.environ["INTENT_ROUTER"] = "embedding"
+    if args.model == "hashing":
+        from synthetic import install_offline_model
+        install_offline_model()
+
+    from utils.intent import router, keyword_intent, classify_intent, detect_intent
+
+    is_book = lambda label: "booking" if label == "book" else "general"
+    print(f"booking vs general, legacy substrings : {accuracy(legacy_detect_intent, is_book):.0%}")
+    print(f"booking vs general, router           : {accuracy(detect_intent, is_book):.0%}")
+    print(f"8 intents, keyword pattern           : {accuracy(keyword_intent, lambda l: l):.0%}")
+
+    router.clear()
+    start = time.perf_counter()
+    full = accuracy(classify_intent, lambda l: l)
+    print(f"8 intents, embedding router ({args.model}) : {full:.0%} "
+          f"({(time.perf_counter() - start) / len(LABELLED) * 1000:.2f}ms per message, cold)")
+
+    for text, label in LABELLED:
+        predicted = classify_intent(text)
+        if predicted != label:
+            print(f"  miss: {text!r} -> {predicted} (expected {label})")
+
+    start = time.perf_counter()
+    for i in range(args.repeat):
+        router.classify(LABELLED[i % len(LABELLED)][0])
+    print(f"cache hit: {(time.perf_counter() - start) / args.repeat * 1e6:.1f}µs per message")
+
+
+if __name__ == "__main__":
+    main()
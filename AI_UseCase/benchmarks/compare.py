@@ -0,0 +1,82 @@
+"""Compare two run_suite.py result files.
+
+Lists every timing (*_s, *_ms: lower is better) and rate (*_per_s: higher
+is better) present in both, flagging changes beyond --threshold.
+
+    python benchmarks/compare.py results/base.json results/HEAD.json --threshold 0.1
+"""
+import sys
+import json
+import argparse
+
+
+def _metrics(node, path=""):
+    # List entries are keyed by their size field (pages, rows, threads) when they have one
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from _metrics(value, f"{path}.{key}" if path else key)
+    elif isinstance(node, list):
+        for i, item in enumerate(node):
+            label = next((f"{k}={item[k]}" for k in ("pages", "rows", "threads") if isinstance(item, dict) and k in item), str(i))
+            yield from _metrics(item, f"{path}[{label}]")
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield path, node
+
+
+def _direction(name):
+    leaf = name.rsplit(".", 1)[-1]
+    if leaf.endswith("_per_s"):
+        return 1
+    if leaf.endswith("_s") or leaf.endswith("_ms"):
+        return -1
+    return 0
+
+
+def compare(base, head, threshold):
+    """[(metric, base, head, change, verdict)] where change is head/base - 1."""
+    base_metrics = dict(_metrics(base["results"]))
+    rows = []
+
+    for name, new in _metrics(head["results"]):
+        direction = _direction(name)
+        old = base_metrics.get(name)
+        if not direction or old is None or old == 0:
+            continue
+
+        change = new / old - 1
+        better = change * direction
+        verdict = "better" if better > threshold else "WORSE" if better < -threshold else ""
+        rows.append((name, old, new, change, verdict))
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change worth flagging")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, encoding="utf-8") as f:
+        head = json.load(f)
+
+    print(f"base {base['meta'].get('commit')}  ->  head {head['meta'].get('commit')}")
+    rows = compare(base, head, args.threshold)
+    width = max((len(r[0]) for r in rows), default=10)
+
+    for name, old, new, change, verdict in rows:
+        print(f"{name:<{width}}  {old:>12.4f}  {new:>12.4f}  {change:>+8.1%}  {verdict}")
+
+    regressions = sum(1 for r in rows if r[4] == "WORSE")
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+
+    if args.fail_on_regression and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""End-to-end benchmark suite: PDF ingestion, retrieval, intent routing and
+booking writes, with results written to JSON for comparison between commits.
+
+Runs fully offline: PDFs and bookings are synthetic (benchmarks/synthetic.py)
+and embeddings come from a hashing stand-in unless --model real is given.
+The database lives in a temporary directory.
+
+    python benchmarks/run_suite.py --out results/HEAD.json
+    python benchmarks/run_suite.py --quick --scenarios bookings concurrent
+    python benchmarks/compare.py results/base.json results/HEAD.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import itertools
+import tempfile
+import threading
+import subprocess
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ["ingest", "retrieval", "intent", "bookings", "concurrent"]
+
+FULL = {
+    "pages": [10, 50, 200],
+    "booking_rows": [10_000, 100_000, 1_000_000],
+    "writes": 200,
+    "threads": [1, 4, 8],
+    "queries": 200,
+    "intent_calls": 20_000,
+}
+QUICK = {
+    "pages": [5, 20],
+    "booking_rows": [1_000, 10_000],
+    "writes": 50,
+    "threads": [1, 4],
+    "queries": 50,
+    "intent_calls": 2_000,
+}
+
+QUESTIONS = [
+    "What services are available?",
+    "Which doctors are available today?",
+    "What are the clinic working hours?",
+    "Where is the clinic address?",
+    "Do I need fasting before the laboratory sample?",
+    "How does billing and insurance work?",
+    "Is there parking for patients at the clinic?",
+    "Can I get my prescription from the pharmacy?",
+]
+MESSAGES = QUESTIONS + [
+    "I want to book an appointment",
+    "schedule a consultation with a cardiologist",
+    "John Smith",
+    "john.smith@example.com",
+    "9876543210",
+    "2030-01-02",
+    "10 AM",
+    "thanks!",
+]
+
+
+# ---------------- HELPERS ----------------
+def summarize(samples):
+    """Latency percentiles in milliseconds for a list of durations in seconds."""
+    xs = sorted(samples)
+    if not xs:
+        return {"count": 0}
+
+    def pct(p):
+        return xs[min(len(xs) - 1, round(p / 100 * (len(xs) - 1)))] * 1000
+
+    return {
+        "count": len(xs),
+        "mean_ms": sum(xs) / len(xs) * 1000,
+        "p50_ms": pct(50),
+        "p90_ms": pct(90),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": xs[-1] * 1000,
+    }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def best_of(repeat, fn, *args, **kwargs):
+    runs = [timed(fn, *args, **kwargs) for _ in range(repeat)]
+    return min(t for t, _ in runs), runs[-1][1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+# Appointment slots in 2030+, far from the seeded history; one per write
+_slot_counter = itertools.count()
+
+
+def next_slot():
+    i = next(_slot_counter)
+    day = date(2030, 1, 1) + timedelta(days=i // 18)
+    minutes = 9 * 60 + (i % 18) * 30
+    return day.isoformat(), f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def booking_request(i):
+    day, slot = next_slot()
+    return {
+        "name": f"Bench Patient {i}",
+        "email": f"bench{i % 500}@example.com",
+        "phone": "9876543210",
+        "service": "General Consultation",
+        "date": day,
+        "time": slot,
+    }
+
+
+# ---------------- SCENARIOS ----------------
+def bench_ingest(cfg, repeat):
+    from synthetic import clinic_pdf
+    from models.embeddings import embedding_cache
+    from utils.rag import extract_document, iter_chunks, build_rag_data
+
+    # Start the extraction pool outside the timings
+    extract_document("warmup.pdf", clinic_pdf(cfg["pages"][-1]))
+    results = []
+
+    for pages in cfg["pages"]:
+        data = clinic_pdf(pages, seed=pages)
+        extract_s, doc = best_of(repeat, extract_document, f"clinic-{pages}.pdf", data)
+
+        text = doc["text"]
+        chunk_s, chunks = best_of(repeat, lambda: list(iter_chunks(text, [(0, len(text))])))
+
+        def build():
+            embedding_cache.clear()
+            return build_rag_data([doc])
+
+        build_s, rag_data = best_of(repeat, build)
+
+        results.append({
+            "pages": pages,
+            "pdf_bytes": len(data),
+            "text_chars": len(text),
+            "chunks": len(chunks),
+            "extract_s": extract_s,
+            "chunk_s": chunk_s,
+            "build_s": build_s,
+            "total_s": extract_s + build_s,
+            "pages_per_s": pages / (extract_s + build_s),
+            "chunk_mb_per_s": len(text) / 1e6 / chunk_s if chunk_s else None,
+        })
+        print(f"  ingest {pages:>4} pages: extract {extract_s:.3f}s, build {build_s:.3f}s, {len(chunks)} chunks")
+
+    return results
+
+
+def bench_retrieval(cfg, repeat):
+    from synthetic import clinic_pdf
+    from utils.rag import extract_document, build_rag_data, get_rag_answer, retrieve
+    from utils.answer_cache import answer_cache
+
+    pages = cfg["pages"][-1]
+    rag_data = build_rag_data([extract_document("clinic.pdf", clinic_pdf(pages, seed=pages))])
+
+    # First query pays for the index and embedder warm-up
+    get_rag_answer(QUESTIONS[-1], rag_data)
+
+    answer, cached, search = [], [], []
+    for i in range(cfg["queries"]):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        # get_rag_answer is timed without the answer cache, then from it
+        answer_cache.clear()
+        answer.append(timed(get_rag_answer, question, rag_data)[0])
+        cached.append(timed(get_rag_answer, question, rag_data)[0])
+        search.append(timed(retrieve, question, rag_data)[0])
+
+    result = {
+        "pages": pages,
+        "chunks": len(rag_data["chunks"]),
+        "get_rag_answer": summarize(answer),
+        "get_rag_answer_cached": summarize(cached),
+        "retrieve": summarize(search),
+    }
+    print(f"  retrieval: get_rag_answer p50 {result['get_rag_answer']['p50_ms']:.2f}ms "
+          f"({result['get_rag_answer_cached']['p50_ms']:.3f}ms cached), "
+          f"retrieve p50 {result['retrieve']['p50_ms']:.2f}ms")
+    return result
+
+
+def bench_intent(cfg, repeat):
+    from utils.intent import detect_intent, is_question
+
+    result = {}
+    for name, fn in [("detect_intent", detect_intent), ("is_question", is_question)]:
+        for message in MESSAGES:
+            fn(message)
+
+        samples = [
+            timed(fn, MESSAGES[i % len(MESSAGES)])[0]
+            for i in range(cfg["intent_calls"])
+        ]
+        result[name] = summarize(samples)
+        result[name]["calls_per_s"] = len(samples) / sum(samples)
+        print(f"  intent: {name} p50 {result[name]['p50_ms'] * 1000:.1f}µs")
+
+    return result
+
+
+def bench_bookings(cfg, repeat):
+    from synthetic import seed_bookings
+    from db.database import get_connection
+    from utils.availability import availability
+    from utils.booking import save_booking, get_bookings_by_email
+    from utils.admin import get_bookings_page, count_bookings, query_cache
+
+    conn = get_connection()
+    results = []
+    seeded = 0
+
+    # Keep the one-off pandas import out of the first cold page timing
+    get_bookings_page({})
+
+    for rows in cfg["booking_rows"]:
+        start = time.perf_counter()
+        seed_bookings(conn, seeded, rows - seeded)
+        seed_s = time.perf_counter() - start
+        seeded = rows
+
+        availability.invalidate()
+        load_s, _ = timed(save_booking, booking_request(-1))
+
+        writes = [timed(save_booking, booking_request(i)) for i in range(cfg["writes"])]
+        failed = sum(1 for _, booking_id in writes if not booking_id)
+        write_times = [t for t, _ in writes]
+
+        lookups = [timed(get_bookings_by_email, f"patient{i * 37 % (rows // 5)}@example.com")[0]
+                   for i in range(cfg["queries"])]
+
+        def cold(fn, *args):
+            query_cache.clear()
+            return timed(fn, *args)[0]
+
+        page = [cold(get_bookings_page, {"status": "CONFIRMED"}) for _ in range(repeat)]
+        count = [cold(count_bookings, {"service": "Skin Treatment", "date_from": "2023-01-01"})
+                 for _ in range(repeat)]
+        warm_page = [timed(get_bookings_page, {"status": "CONFIRMED"})[0] for _ in range(cfg["queries"])]
+
+        results.append({
+            "rows": rows,
+            "seed_s": seed_s,
+            "first_write_s": load_s,
+            "save_booking": summarize(write_times),
+            "writes_per_s": len(write_times) / sum(write_times),
+            "failed_writes": failed,
+            "bookings_by_email": summarize(lookups),
+            "admin_page_cold": summarize(page),
+            "admin_page_cached": summarize(warm_page),
+            "admin_count_cold": summarize(count),
+        })
+        print(f"  bookings {rows:>8} rows: save p50 {results[-1]['save_booking']['p50_ms']:.2f}ms, "
+              f"admin page {results[-1]['admin_page_cold']['p50_ms']:.2f}ms, failed {failed}")
+
+    return results
+
+
+def bench_concurrent(cfg, repeat):
+    from db.database import close_connection
+    from utils.booking import save_booking
+
+    results = []
+    for threads in cfg["threads"]:
+        latencies, failures = [], []
+        lock = threading.Lock()
+
+        def writer(worker):
+            local, failed = [], 0
+            for i in range(cfg["writes"]):
+                elapsed, booking_id = timed(save_booking, booking_request(worker * 100_000 + i))
+                local.append(elapsed)
+                failed += not booking_id
+            close_connection()
+            with lock:
+                latencies.extend(local)
+                failures.append(failed)
+
+        pool = [threading.Thread(target=writer, args=(w,)) for w in range(threads)]
+        start = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        wall = time.perf_counter() - start
+
+        results.append({
+            "threads": threads,
+            "writes": len(latencies),
+            "failed_writes": sum(failures),
+            "wall_s": wall,
+            "writes_per_s": len(latencies) / wall,
+            "save_booking": summarize(latencies),
+        })
+        print(f"  concurrent {threads} writers: {results[-1]['writes_per_s']:.0f} writes/s, "
+              f"p99 {results[-1]['save_booking']['p99_ms']:.2f}ms, failed {sum(failures)}")
+
+    return results
+
+
+RUNNERS = {
+    "ingest": bench_ingest,
+    "retrieval": bench_retrieval,
+    "intent": bench_intent,
+    "bookings": bench_bookings,
+    "concurrent": bench_concurrent,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default="benchmark-results.json")
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--quick", action="store_true", help="small sizes, for a smoke run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--model", choices=["hashing", "real"], default="hashing",
+                        help="'real' uses the configured sentence-transformers model from the local cache")
+    parser.add_argument("--keep-db", action="store_true", help="leave the benchmark database behind")
+    args = parser.parse_args()
+
+    cfg = QUICK if args.quick else FULL
+    workdir = tempfile.mkdtemp(prefix="clinic-bench-")
+
+    # Before any project import: config reads these once
+    os.environ["DB_NAME"] = os.path.join(workdir, "bench.db")
+    os.environ["RAG_CACHE_DIR"] = os.path.join(workdir, "rag_cache")
+    os.environ["HF_HUB_OFFLINE"] = "1"
+
+    from db.migrations import migrate
+    migrate()
+
+    if args.model == "hashing":
+        from synthetic import install_offline_model
+        install_offline_model()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "model": args.model,
+            "quick": args.quick,
+            "repeat": args.repeat,
+            "config": cfg,
+        },
+        "results": {},
+    }
+
+    try:
+        for name in args.scenarios:
+            print(f"[{name}]")
+            report["results"][name] = RUNNERS[name](cfg, args.repeat)
+    finally:
+        if args.keep_db:
+            print(f"database kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Deterministic, offline inputs for the benchmark suite.
+
+- clinic_pdf(): clinic manuals of any page count, written as plain PDF so
+  no extra library is needed.
+- HashingEmbeddingModel: a stand-in for the sentence-transformers model
+  (same interface, 384 dims) so nothing is downloaded.
+- seed_bookings(): bulk booking history for the database scenarios.
+"""
+import random
+import hashlib
+from datetime import date, timedelta
+
+import numpy as np
+
+DOCTORS = [
+    ("Sharma", "General Physician"), ("Mehta", "Cardiologist"), ("Rao", "Dermatologist"),
+    ("Iyer", "Endocrinologist"), ("Khan", "Pediatrician"), ("Das", "Orthopedic Surgeon"),
+]
+SERVICES = [
+    "General Consultation", "Cardiology Consultation", "Skin Treatment",
+    "Blood Pressure Monitoring", "Diabetes Management", "Child Vaccination",
+]
+WORDS = (
+    "patients doctor clinic appointment report visit treatment follow-up reception "
+    "billing insurance pharmacy laboratory sample fasting prescription referral "
+    "emergency parking records consent waiting schedule review"
+).split()
+HOURS = ["9:00 AM – 1:00 PM", "2:00 PM – 5:00 PM", "10:00 AM – 4:00 PM", "9:00 AM – 6:00 PM"]
+
+
+# ---------------- PDF ----------------
+def _page_lines(rng, page):
+    lines = []
+
+    if page % 3 == 0:
+        lines += ["ABC HEALTH CARE CLINIC", "", "Address",
+                  f"{page + 1} Floor, Sunrise Complex MG Road, Hyderabad Telangana – 500001", "",
+                  "Working Hours", "Monday to Saturday: 9:00 AM – 6:00 PM", "Sunday: Closed", ""]
+    if page % 3 == 1:
+        lines += ["Doctor Details", ""]
+        for name, specialization in rng.sample(DOCTORS, 3):
+            lines += [f"Dr. {name[0]}. {name}", f"Specialization: {specialization}",
+                      f"Experience: {rng.randint(3, 25)} years",
+                      f"Consultation Time: {rng.choice(HOURS)}", ""]
+    if page % 3 == 2:
+        lines += ["Services Available"] + [f"• {s}" for s in rng.sample(SERVICES, 4)] + [""]
+
+    lines += ["Notes"]
+    for _ in range(12):
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16)))
+        lines.append("• " + sentence.capitalize() + ".")
+
+    return lines
+
+
+def _escape(line):
+    text = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return text.encode("cp1252", errors="replace")
+
+
+def clinic_pdf(pages, seed=0):
+    """PDF bytes of a clinic manual with the given number of text pages."""
+    rng = random.Random(seed)
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(None)
+    pages_obj = add(None)
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    kids = []
+    for page in range(pages):
+        stream = b"BT /F1 10 Tf 14 TL 50 760 Td " + b" ".join(
+            b"(" + _escape(line) + b") Tj T*" for line in _page_lines(rng, page)
+        ) + b" ET"
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_obj, font, content)
+        ))
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
+
+
+# ---------------- EMBEDDINGS ----------------
+class HashingEmbeddingModel:
+    """Bag-of-words feature hashing with the SentenceTransformer.encode interface."""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=64, normalize_embeddings=False, **kwargs):
+        vectors = np.zeros((len(texts), self.dim), dtype="float32")
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int.from_bytes(hashlib.md5(word.encode()).digest()[:4], "little") % self.dim] += 1
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms == 0, 1, norms)
+        return vectors
+
+
+def install_offline_model():
+    """Use the hashing model for every embedding call in this process."""
+    import models.embeddings as embeddings
+    embeddings._loaded["embedding_model"] = HashingEmbeddingModel()
+
+
+# ---------------- BOOKINGS ----------------
+def seed_bookings(conn, start, count, seed=0, batch_size=50_000):
+    """Append count bookings (and one customer per 5 bookings), numbered from start.
+
+    History sits in 2020–2025 so benchmark writes in later years never collide.
+    """
+    rng = random.Random(seed + start)
+    first_day = date(2020, 1, 1)
+
+    for offset in range(start, start + count, batch_size):
+        n = min(batch_size, start + count - offset)
+        ids = range(offset, offset + n)
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "INSERT OR IGNORE INTO customers (customer_id, name, email, phone) VALUES (?, ?, ?, ?)",
+            [(f"CUS-B{i // 5:07d}", f"Patient {i // 5}", f"patient{i // 5}@example.com", "9876543210")
+             for i in ids if i % 5 == 0]
+        )
+        conn.executemany(
+            "INSERT INTO bookings (id, customer_id, booking_type, date, time, status, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    f"APT-B{i:07d}", f"CUS-B{i // 5:07d}", rng.choice(SERVICES),
+                    (first_day + timedelta(days=rng.randrange(2190))).isoformat(),
+                    f"{rng.randint(9, 17):02d}:{rng.choice(['00', '30'])}",
+                    "CANCELLED" if rng.random() < 0.1 else "CONFIRMED",
+                    f"{(first_day + timedelta(days=i * 2190 // 1_000_000)).isoformat()}T{i % 86400 // 3600:02d}:00:00",
+                )
+                for i in ids
+            ]
+        )
+        conn.execute("COMMIT")
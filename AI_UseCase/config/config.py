@@ -0,0 +1,151 @@
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_secret(name):
+    """Credential from the environment first (local runs, workers), then
+    Streamlit secrets; None when neither has it."""
+    value = os.getenv(name)
+    if value:
+        return value
+    try:
+        import streamlit as st
+        return st.secrets[name]
+    except Exception:
+        return None
+
+
+# ---------------- RAG ----------------
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Content-addressed cache of processed PDFs (chunks, text, FAISS index)
+RAG_CACHE_DIR = os.getenv("RAG_CACHE_DIR", os.path.join(BASE_DIR, ".rag_cache"))
+
+# Heavy ML dependencies (torch, sentence-transformers, faiss, pypdf) load on
+# first use. Set ML_WARMUP=1 to load them in a background thread at startup.
+ML_WARMUP = os.getenv("ML_WARMUP", "0") == "1"
+
+# Loads slower than this (seconds) are reported as over budget
+ML_LOAD_BUDGET_SECONDS = float(os.getenv("ML_LOAD_BUDGET_SECONDS", "10"))
+
+# Semantic retrieval fallback (cosine similarity on normalized embeddings)
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "3"))
+RAG_SIMILARITY_THRESHOLD = float(os.getenv("RAG_SIMILARITY_THRESHOLD", "0.35"))
+
+# Queries arriving while the model is busy are embedded in one call;
+# a window > 0 also makes every batch wait that long for company
+QUERY_BATCH_WINDOW_MS = float(os.getenv("QUERY_BATCH_WINDOW_MS", "0"))
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))
+
+# PDF text extraction: pages are spread over a process pool for large files.
+# Spawning the pool costs about 0.3s per worker, so short PDFs stay sequential
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+
+# Chunk-hash -> embedding cache used by incremental document updates
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+
+# Vector index: "flat" (exact), "sq8" (int8 scalar quantized), "ivf",
+# "ivfpq" (product quantized), or "auto" to choose by number of chunks
+VECTOR_INDEX_MODE = os.getenv("VECTOR_INDEX_MODE", "auto")
+VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "8"))
+# "ivfpq" re-ranks k * this many PQ candidates with int8 vectors
+VECTOR_INDEX_REFINE_K = int(os.getenv("VECTOR_INDEX_REFINE_K", "16"))
+
+# Process-wide knowledge bases kept in memory (others reload from RAG_CACHE_DIR)
+KB_REGISTRY_MAX_ENTRIES = int(os.getenv("KB_REGISTRY_MAX_ENTRIES", "8"))
+
+# Name of the clinic knowledge base published from the Admin page
+DEFAULT_KB_NAME = "clinic"
+
+# Answers to repeated questions, shared by all sessions on the same documents
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2048"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+
+# ---------------- INTENT ROUTING ----------------
+# "auto": embeddings once the MiniLM model is loaded, keywords before that;
+# "embedding" loads the model for routing; "keywords" never uses it
+INTENT_ROUTER = os.getenv("INTENT_ROUTER", "auto")
+# Below this cosine similarity to every intent centroid, keywords decide
+INTENT_MIN_SIMILARITY = float(os.getenv("INTENT_MIN_SIMILARITY", "0.5"))
+INTENT_CACHE_MAX_ENTRIES = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "10000"))
+
+# ---------------- LLM ----------------
+# "generate": document questions are answered by the LLM, grounded on the
+# retrieved chunks and streamed into the chat; "off" keeps the extractive answers
+LLM_MODE = os.getenv("LLM_MODE", "off")
+# "groq" needs GROQ_API_KEY; "stub" is a deterministic offline stand-in;
+# "auto" uses groq when a key is set (environment or Streamlit secrets)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "auto")
+LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "llama-3.1-8b-instant")
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0"))
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "512"))
+# Generations in flight per process; further requests wait up to the timeout
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30"))
+# Completed answers kept per (question, retrieved context)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+# Pause between stub tokens, to try the streaming UI offline
+LLM_STUB_TOKEN_DELAY_MS = float(os.getenv("LLM_STUB_TOKEN_DELAY_MS", "0"))
+
+# ---------------- EMAIL ----------------
+# Point these at a local SMTP stand-in for testing, e.g.
+# SMTP_HOST=localhost SMTP_PORT=1025 SMTP_USE_SSL=0
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_USE_SSL = os.getenv("SMTP_USE_SSL", "1") == "1"
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+
+# Outbox worker: retries with exponential backoff, then gives up
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "30"))
+
+# ---------------- DATABASE ----------------
+DB_NAME = os.getenv("DB_NAME", "appointments.db")
+
+# How long a writer waits for the lock before "database is locked"
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Prepared statements kept per connection
+DB_CACHED_STATEMENTS = int(os.getenv("DB_CACHED_STATEMENTS", "256"))
+
+# Idle connections kept for reuse by later reruns (per database file)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+
+# ---------------- AVAILABILITY ----------------
+SLOT_MINUTES = int(os.getenv("SLOT_MINUTES", "30"))
+CLINIC_OPEN_TIME = os.getenv("CLINIC_OPEN_TIME", "09:00")
+CLINIC_CLOSE_TIME = os.getenv("CLINIC_CLOSE_TIME", "18:00")
+# Python weekday numbers (Monday = 0); the clinic is closed on Sundays
+CLINIC_CLOSED_WEEKDAYS = [int(d) for d in os.getenv("CLINIC_CLOSED_WEEKDAYS", "6").split(",") if d]
+
+# ---------------- ADMIN ----------------
+# Bookings shown per page on the Admin dashboard
+ADMIN_PAGE_SIZE = int(os.getenv("ADMIN_PAGE_SIZE", "50"))
+
+# Admin query results kept until the bookings change log moves
+ADMIN_QUERY_CACHE_MAX_ENTRIES = int(os.getenv("ADMIN_QUERY_CACHE_MAX_ENTRIES", "256"))
+
+# Rows fetched per batch when streaming an export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# ---------------- IMPORT ----------------
+# Rows written per transaction by python -m utils.importer
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+
+# ---------------- METRICS ----------------
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# JSON line per chat turn with its spans; empty disables the log
+METRICS_TRACE_LOG = os.getenv("METRICS_TRACE_LOG", "")
+
+# Profile every turn with cProfile and keep the ones slower than this; 0 disables
+METRICS_SLOW_TURN_MS = float(os.getenv("METRICS_SLOW_TURN_MS", "0"))
+METRICS_PROFILE_DIR = os.getenv("METRICS_PROFILE_DIR", os.path.join(BASE_DIR, ".profiles"))
+
+# Serve Prometheus text at http://localhost:<port>/metrics; 0 disables
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+# Local only by default; "0.0.0.0" exposes it on every interface
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
@@ -1,76 +1,47 @@
-import sqlite3
-import uuid
 from datetime import datetime
 import pandas as pd
 
-DB_NAME = "appointments.db"
+from db.database import get_connection, transaction
+from db.migrations import migrate
+from db.models import normalize_email, upsert_customer
+from utils.ids import new_booking_id
+from utils.availability import check_slot_free
 
 
 # ---------------- INIT DB ----------------
 def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS customers (
-            customer_id TEXT PRIMARY KEY,
-            name TEXT,
-            email TEXT,
-            phone TEXT
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS bookings (
-            id TEXT PRIMARY KEY,
-            customer_id TEXT,
-            booking_type TEXT,
-            date TEXT,
-            time TEXT,
-            status TEXT,
-            created_at TEXT,
-            FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
-        )
-    """)
-
-    conn.commit()
-    conn.close()
+    migrate()
 
 
 # ---------------- SAVE BOOKING ----------------
 def save_booking_to_db(booking):
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cur = conn.cursor()
-
-        customer_id = "CUS-" + uuid.uuid4().hex[:6].upper()
-        booking_id = "APT-" + uuid.uuid4().hex[:6].upper()
-
-        # Save customer
-        cur.execute("""
-            INSERT INTO customers VALUES (?, ?, ?, ?)
-        """, (
-            customer_id,
-            booking["name"],
-            booking["email"],
-            booking["phone"]
-        ))
-
-        # Save booking
-        cur.execute("""
-            INSERT INTO bookings VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            booking_id,
-            customer_id,
-            booking["service"],
-            booking["date"],
-            booking["time"],
-            "CONFIRMED",
-            datetime.now().isoformat()
-        ))
-
-        conn.commit()
-        conn.close()
+        booking_id = new_booking_id()
+
+        with transaction() as conn:
+            cur = conn.cursor()
+
+            # Slot must still be free once the write lock is held
+            check_slot_free(cur, booking["service"], booking["date"], booking["time"])
+
+            # Save customer (or reuse the one with this email)
+            customer_id = upsert_customer(
+                cur, booking["name"], booking["email"], booking["phone"]
+            )
+
+            # Save booking
+            cur.execute("""
+                INSERT INTO bookings VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                booking_id,
+                customer_id,
+                booking["service"],
+                booking["date"],
+                booking["time"],
+                "CONFIRMED",
+                datetime.now().isoformat()
+            ))
+
         return booking_id
 
     except Exception as e:
@@ -80,21 +51,17 @@ def save_booking_to_db(booking):
 
 # ---------------- USER BOOKING RETRIEVAL ----------------
 def get_bookings_by_email(email):
-    conn = sqlite3.connect(DB_NAME)
     query = """
         SELECT b.id, c.name, b.booking_type, b.date, b.time, b.status
         FROM bookings b
         JOIN customers c ON b.customer_id = c.customer_id
         WHERE c.email = ?
     """
-    df = pd.read_sql_query(query, conn, params=(email,))
-    conn.close()
-    return df
+    return pd.read_sql_query(query, get_connection(), params=(normalize_email(email),))
 
 
 # ---------------- ADMIN ----------------
 def get_all_bookings():
-    conn = sqlite3.connect(DB_NAME)
     query = """
         SELECT 
             b.id,
@@ -110,28 +77,20 @@ def get_all_bookings():
         JOIN customers c ON b.customer_id = c.customer_id
         ORDER BY b.created_at DESC
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    return pd.read_sql_query(query, get_connection())
 
 
 def cancel_booking(booking_id):
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE bookings SET status='CANCELLED'
-        WHERE id=?
-    """, (booking_id,))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("""
+            UPDATE bookings SET status='CANCELLED'
+            WHERE id=?
+        """, (booking_id,))
 
 
 def update_booking_status(booking_id, status):
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE bookings SET status=?
-        WHERE id=?
-    """, (status, booking_id))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        conn.execute("""
+            UPDATE bookings SET status=?
+            WHERE id=?
+        """, (status, booking_id))
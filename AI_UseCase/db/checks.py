@@ -0,0 +1,73 @@
+"""Query-plan checks for the hot queries.
+
+Run after migrating to confirm the indexes are actually used:
+
+    python -m db.checks
+"""
+import re
+import sys
+
+from db.database import get_connection
+
+# "SCAN b" / "SCAN bookings" without an index means a full table scan
+FULL_SCAN_PATTERN = re.compile(r"^SCAN (\w+)\b(?! USING (COVERING )?INDEX)")
+
+
+def explain_query_plan(sql, params=(), path=None):
+    rows = get_connection(path).execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def full_scans(sql, params=(), path=None):
+    return [
+        detail for detail in explain_query_plan(sql, params, path)
+        if FULL_SCAN_PATTERN.match(detail)
+    ]
+
+
+def hot_queries():
+    from utils.booking import BOOKINGS_BY_EMAIL_QUERY
+    from utils.admin import ALL_BOOKINGS_QUERY, _page_query
+    from utils.availability import SLOT_BOOKINGS_QUERY
+
+    page_sql, page_params = _page_query(
+        {"status": "CONFIRMED"}, ("2030-01-01T00:00:00", "APT-000000")
+    )
+
+    return {
+        "bookings by email": (BOOKINGS_BY_EMAIL_QUERY, ("someone@example.com",)),
+        "admin bookings list": (ALL_BOOKINGS_QUERY, ()),
+        "admin bookings page": (page_sql, page_params + [50]),
+        "slot check": (SLOT_BOOKINGS_QUERY, ("2030-01-01",)),
+        "bookings by slot": (
+            "SELECT id FROM bookings WHERE date = ? AND time = ?",
+            ("2030-01-01", "10:00")
+        ),
+    }
+
+
+def check_query_plans(path=None):
+    """{query name: [full-scan plan lines]}; empty lists mean every lookup is indexed."""
+    return {
+        name: full_scans(sql, params, path)
+        for name, (sql, params) in hot_queries().items()
+    }
+
+
+def main():
+    from db.migrations import migrate
+    migrate()
+
+    failed = False
+    for name, (sql, params) in hot_queries().items():
+        scans = full_scans(sql, params)
+        print(f"{'FAIL' if scans else 'ok  '} {name}")
+        for detail in explain_query_plan(sql, params):
+            print(f"       {detail}")
+        failed = failed or bool(scans)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,120 @@
+import queue
 import sqlite3
-from app.config import DB_NAME
+import threading
+from contextlib import contextmanager
+
+from config.config import DB_NAME, DB_BUSY_TIMEOUT_MS, DB_CACHED_STATEMENTS, DB_POOL_SIZE
+
+# Streamlit runs every rerun on a new thread, so connections are not tied to
+# threads: a thread leases one per database file from a small shared pool and
+# hands it back when the thread ends. The next rerun then gets a connection
+# with its PRAGMAs set and its prepared-statement cache warm.
+_idle = {}
+_idle_lock = threading.Lock()
+_local = threading.local()
+
+
+def _connect(path):
+    conn = sqlite3.connect(
+        path,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000.0,
+        cached_statements=DB_CACHED_STATEMENTS,
+        # Transactions are explicit (see transaction()); plain reads autocommit
+        isolation_level=None,
+        # Leased to one thread at a time, but not always the same thread
+        check_same_thread=False
+    )
+
+    # WAL: readers never block the writer and the writer never blocks readers
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+    return conn
+
+
+def _idle_queue(path):
+    with _idle_lock:
+        if path not in _idle:
+            _idle[path] = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+        return _idle[path]
+
+
+def _acquire(path):
+    try:
+        return _idle_queue(path).get_nowait()
+    except queue.Empty:
+        return _connect(path)
+
+
+def _release(path, conn):
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+        _idle_queue(path).put_nowait(conn)
+    except queue.Full:
+        # More threads than DB_POOL_SIZE were active at once: drop the extra
+        conn.close()
+    except Exception as e:
+        print("DB ERROR:", e)
+        conn.close()
+
+
+class _Lease:
+    """Connections held by one thread; returned to the pool when it ends."""
+
+    def __init__(self):
+        self.connections = {}
+
+    def __del__(self):
+        for path, conn in self.connections.items():
+            _release(path, conn)
+
+
+def get_connection(path=None):
+    """This thread's connection to ``path`` (default DB_NAME). Do not close it."""
+    path = path or DB_NAME
+    lease = getattr(_local, "lease", None)
+    if lease is None:
+        lease = _local.lease = _Lease()
+
+    conn = lease.connections.get(path)
+    if conn is None:
+        conn = lease.connections[path] = _acquire(path)
+    return conn
+
+
+def close_connection(path=None):
+    lease = getattr(_local, "lease", None)
+    conn = lease.connections.pop(path or DB_NAME, None) if lease else None
+    if conn is not None:
+        conn.close()
+
+
+@contextmanager
+def transaction(immediate=True, path=None):
+    """Commit on success, roll back on error.
+
+    Writers take the write lock up front (BEGIN IMMEDIATE) so two sessions
+    never both read and then fail to upgrade to a write.
+    """
+    conn = get_connection(path)
+
+    # Nested use joins the outer transaction
+    if conn.in_transaction:
+        yield conn
+        return
+
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
 
-def get_connection():
-    return sqlite3.connect(DB_NAME)
 
 def init_db():
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS customers (
-            customer_id TEXT PRIMARY KEY,
-            name TEXT,
-            email TEXT,
-            phone TEXT
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS bookings (
-            id TEXT PRIMARY KEY,
-            customer_id TEXT,
-            booking_type TEXT,
-            date TEXT,
-            time TEXT,
-            status TEXT,
-            created_at TEXT,
-            FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
-        )
-    """)
-
-    conn.commit()
-    conn.close()
+    # Schema lives in db/migrations.py; imported here to avoid an import cycle
+    from db.migrations import migrate
+    migrate()
@@ -0,0 +1,119 @@
+"""One-off maintenance tasks.
+
+    python -m db.maintenance compact-customers [--dry-run]
+    python -m db.maintenance prune-changes [--keep N]
+"""
+import argparse
+
+from db.database import transaction
+
+
+# ---------------- CUSTOMER COMPACTION ----------------
+def compact_customers(cur):
+    """Merge customers sharing a normalized email into the oldest row.
+
+    Bookings of the merged rows are repointed to the survivor, which takes
+    the most recent name and phone. Returns (customers_merged, bookings_repointed).
+    """
+    cur.execute("""
+        UPDATE customers SET email = lower(trim(email))
+        WHERE email IS NOT NULL AND email <> lower(trim(email))
+    """)
+
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS customer_merge (
+            old_id TEXT PRIMARY KEY,
+            keep_id TEXT
+        )
+    """)
+    cur.execute("DELETE FROM customer_merge")
+
+    cur.execute("""
+        INSERT INTO customer_merge (old_id, keep_id)
+        SELECT c.customer_id, k.customer_id
+        FROM customers c
+        JOIN (
+            SELECT email, MIN(rowid) AS keep_rowid
+            FROM customers
+            WHERE email IS NOT NULL
+            GROUP BY email
+            HAVING COUNT(*) > 1
+        ) d ON c.email = d.email
+        JOIN customers k ON k.rowid = d.keep_rowid
+        WHERE c.rowid <> d.keep_rowid
+    """)
+    merged = cur.execute("SELECT COUNT(*) FROM customer_merge").fetchone()[0]
+
+    if merged:
+        cur.execute("""
+            UPDATE customers SET (name, phone) = (
+                SELECT l.name, l.phone FROM customers l
+                WHERE l.email = customers.email
+                ORDER BY l.rowid DESC LIMIT 1
+            )
+            WHERE customer_id IN (SELECT keep_id FROM customer_merge)
+        """)
+
+        cur.execute("""
+            UPDATE bookings SET customer_id = (
+                SELECT keep_id FROM customer_merge WHERE old_id = bookings.customer_id
+            )
+            WHERE customer_id IN (SELECT old_id FROM customer_merge)
+        """)
+        repointed = cur.rowcount
+
+        cur.execute("DELETE FROM customers WHERE customer_id IN (SELECT old_id FROM customer_merge)")
+    else:
+        repointed = 0
+
+    cur.execute("DROP TABLE customer_merge")
+    return merged, repointed
+
+
+# ---------------- CHANGE LOG ----------------
+def prune_change_log(cur, keep=10000):
+    """Drop all but the newest keep booking_changes rows; returns rows deleted.
+
+    Caches older than what is left simply recompute instead of patching.
+    """
+    cur.execute(
+        "DELETE FROM booking_changes WHERE version <= (SELECT MAX(version) FROM booking_changes) - ?",
+        (keep,)
+    )
+    return cur.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact = sub.add_parser("compact-customers", help="merge duplicate customers by email")
+    compact.add_argument("--dry-run", action="store_true", help="report without saving")
+    prune = sub.add_parser("prune-changes", help="trim the booking change log")
+    prune.add_argument("--keep", type=int, default=10000, help="newest entries to keep")
+    args = parser.parse_args()
+
+    if args.command == "compact-customers":
+        class DryRun(Exception):
+            pass
+
+        result = None
+        try:
+            with transaction() as conn:
+                result = compact_customers(conn.cursor())
+                if args.dry_run:
+                    raise DryRun()
+        except DryRun:
+            pass
+
+        merged, repointed = result
+        verb = "would merge" if args.dry_run else "merged"
+        print(f"{verb} {merged} duplicate customers, {repointed} bookings repointed")
+
+    elif args.command == "prune-changes":
+        with transaction() as conn:
+            deleted = prune_change_log(conn.cursor(), args.keep)
+        print(f"pruned {deleted} change log entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+from datetime import datetime
+
+from db.database import get_connection, transaction
+from db.maintenance import compact_customers
+
+# -------------------------------------------------
+# Ordered schema upgrades. The applied version is stored in
+# PRAGMA user_version; each step runs once, in its own transaction,
+# and is written to be idempotent on databases created before this
+# runner existed (CREATE ... IF NOT EXISTS).
+# -------------------------------------------------
+
+
+def _base_schema(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS customers (
+            customer_id TEXT PRIMARY KEY,
+            name TEXT,
+            email TEXT,
+            phone TEXT
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS bookings (
+            id TEXT PRIMARY KEY,
+            customer_id TEXT,
+            booking_type TEXT,
+            date TEXT,
+            time TEXT,
+            status TEXT,
+            created_at TEXT,
+            FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+        )
+    """)
+
+
+def _email_outbox(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            booking_id TEXT,
+            to_email TEXT,
+            subject TEXT,
+            body TEXT,
+            status TEXT,
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at TEXT,
+            last_error TEXT,
+            created_at TEXT,
+            sent_at TEXT
+        )
+    """)
+
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_email_outbox_due
+        ON email_outbox(status, next_attempt_at)
+    """)
+
+
+def _lookup_indexes(cur):
+    # Email lookup join, admin ORDER BY created_at, slot lookups by date/time
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_customers_email ON customers(email)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_customer_id ON bookings(customer_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_created_at ON bookings(created_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_date_time ON bookings(date, time)")
+
+
+def _unique_customer_email(cur):
+    # Existing duplicates must be merged before the constraint can exist
+    compact_customers(cur)
+    cur.execute("DROP INDEX IF EXISTS idx_customers_email")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_customers_email_unique ON customers(email)")
+
+
+def _admin_list_indexes(cur):
+    # Keyset pages walk (created_at, id) in order; status/service filters seek first
+    cur.execute("DROP INDEX IF EXISTS idx_bookings_created_at")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_created_at_id ON bookings(created_at, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_status_created_at ON bookings(status, created_at, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_type_date ON bookings(booking_type, date)")
+
+
+def _booking_change_log(cur):
+    # One row per booking write, with the filterable columns as they were
+    # before it; MAX(version) is the write version read caches compare against
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS booking_changes (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            booking_id TEXT NOT NULL,
+            old_exists INTEGER NOT NULL,
+            old_type TEXT,
+            old_date TEXT,
+            old_status TEXT
+        )
+    """)
+
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_bookings_insert_log AFTER INSERT ON bookings
+        BEGIN
+            INSERT INTO booking_changes (booking_id, old_exists) VALUES (NEW.id, 0);
+        END
+    """)
+
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_bookings_update_log AFTER UPDATE ON bookings
+        BEGIN
+            INSERT INTO booking_changes (booking_id, old_exists, old_type, old_date, old_status)
+            VALUES (NEW.id, 1, OLD.booking_type, OLD.date, OLD.status);
+        END
+    """)
+
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_bookings_delete_log AFTER DELETE ON bookings
+        BEGIN
+            INSERT INTO booking_changes (booking_id, old_exists, old_type, old_date, old_status)
+            VALUES (OLD.id, 1, OLD.booking_type, OLD.date, OLD.status);
+        END
+    """)
+
+    # Name / email / phone appear in the admin rows of every booking of the customer
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_customers_update_log AFTER UPDATE ON customers
+        WHEN OLD.name IS NOT NEW.name OR OLD.email IS NOT NEW.email OR OLD.phone IS NOT NEW.phone
+        BEGIN
+            INSERT INTO booking_changes (booking_id, old_exists, old_type, old_date, old_status)
+            SELECT id, 1, booking_type, date, status FROM bookings
+            WHERE customer_id = NEW.customer_id;
+        END
+    """)
+
+
+MIGRATIONS = [
+    (1, "customers and bookings tables", _base_schema),
+    (2, "email outbox", _email_outbox),
+    (3, "lookup indexes", _lookup_indexes),
+    (4, "one customer per email", _unique_customer_email),
+    (5, "admin list indexes", _admin_list_indexes),
+    (6, "booking change log", _booking_change_log),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# -------------------------------------------------
+# RUNNER
+# -------------------------------------------------
+def schema_version(path=None):
+    return get_connection(path).execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(path=None):
+    """Apply every pending migration; returns the versions applied."""
+    applied = []
+
+    # Runs on every rerun: an up-to-date schema must not take the write lock
+    current = schema_version(path)
+    if current >= LATEST_VERSION:
+        return applied
+
+    for version, description, upgrade in MIGRATIONS:
+        if current >= version:
+            continue
+
+        # Re-checked inside the write lock: another process may have migrated
+        with transaction(path=path) as conn:
+            if schema_version(path) >= version:
+                continue
+
+            upgrade(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+
+        print(f"DB MIGRATION {version}: {description} ({datetime.now().isoformat()})")
+        applied.append(version)
+
+    return applied
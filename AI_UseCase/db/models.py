@@ -1,40 +1,53 @@
-import uuid
 from datetime import datetime
-from db.database import get_connection
+from db.database import get_connection, transaction
+from utils.availability import check_slot_free
+from utils.ids import new_booking_id, new_customer_id
 
-def save_booking(data):
-    conn = get_connection()
-    cur = conn.cursor()
 
-    customer_id = "CUS-" + uuid.uuid4().hex[:6].upper()
-    booking_id = "APT-" + uuid.uuid4().hex[:6].upper()
+def normalize_email(email):
+    return email.strip().lower()
+
 
+def upsert_customer(cur, name, email, phone):
+    """customer_id for ``email``, creating the customer or refreshing name/phone."""
     cur.execute(
-        "INSERT INTO customers VALUES (?, ?, ?, ?)",
-        (customer_id, data["name"], data["email"], data["phone"])
+        """
+        INSERT INTO customers (customer_id, name, email, phone) VALUES (?, ?, ?, ?)
+        ON CONFLICT(email) DO UPDATE SET name = excluded.name, phone = excluded.phone
+        RETURNING customer_id
+        """,
+        (new_customer_id(), name, normalize_email(email), phone)
     )
+    return cur.fetchone()[0]
 
-    cur.execute(
-        "INSERT INTO bookings VALUES (?, ?, ?, ?, ?, ?, ?)",
-        (
-            booking_id,
-            customer_id,
-            data["service"],
-            data["date"],
-            data["time"],
-            "CONFIRMED",
-            datetime.now().isoformat()
+
+def save_booking(data):
+    booking_id = new_booking_id()
+
+    with transaction() as conn:
+        cur = conn.cursor()
+
+        check_slot_free(cur, data["service"], data["date"], data["time"])
+        customer_id = upsert_customer(cur, data["name"], data["email"], data["phone"])
+
+        cur.execute(
+            "INSERT INTO bookings VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                booking_id,
+                customer_id,
+                data["service"],
+                data["date"],
+                data["time"],
+                "CONFIRMED",
+                datetime.now().isoformat()
+            )
         )
-    )
 
-    conn.commit()
-    conn.close()
     return booking_id
 
 
 def get_bookings_by_email(email):
-    conn = get_connection()
-    cur = conn.cursor()
+    cur = get_connection().cursor()
 
     cur.execute("""
         SELECT b.id, b.booking_type, b.date, b.time, b.status
@@ -42,8 +55,6 @@ def get_bookings_by_email(email):
         JOIN customers c ON b.customer_id = c.customer_id
         WHERE c.email = ?
         ORDER BY b.created_at DESC
-    """, (email,))
+    """, (normalize_email(email),))
 
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    return cur.fetchall()
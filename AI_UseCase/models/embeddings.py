@@ -0,0 +1,266 @@
+import time
+import queue
+import hashlib
+import itertools
+import threading
+from concurrent.futures import Future
+
+from config.config import (
+    EMBEDDING_MODEL_NAME,
+    ML_LOAD_BUDGET_SECONDS,
+    QUERY_BATCH_WINDOW_MS,
+    QUERY_BATCH_MAX_SIZE,
+    EMBEDDING_CACHE_MAX_ENTRIES
+)
+from utils.metrics import timed
+from utils.lru import LRUCache
+
+# -------------------------------------------------
+# Process-wide lazy loaders for the ML stack.
+# Nothing heavy is imported until a PDF is actually processed,
+# so the Admin / Instructions pages never pay for torch or FAISS.
+# -------------------------------------------------
+# One lock per component: loading the model must not hold up FAISS or pypdf
+_locks = {}
+_locks_lock = threading.Lock()
+_loaded = {}
+_load_times = {}
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+
+def _component_lock(name):
+    with _locks_lock:
+        return _locks.setdefault(name, threading.Lock())
+
+
+def _load(name, loader):
+    if name in _loaded:
+        return _loaded[name]
+
+    with _component_lock(name):
+        if name not in _loaded:
+            start = time.perf_counter()
+            _loaded[name] = loader()
+            elapsed = time.perf_counter() - start
+            _load_times[name] = elapsed
+
+            if elapsed > ML_LOAD_BUDGET_SECONDS:
+                print(f"ML LOAD WARNING: {name} took {elapsed:.2f}s "
+                      f"(budget {ML_LOAD_BUDGET_SECONDS:.2f}s)")
+
+    return _loaded[name]
+
+
+def _import_faiss():
+    import faiss
+    return faiss
+
+
+def _import_pdf_reader():
+    from pypdf import PdfReader
+    return PdfReader
+
+
+def _build_embedding_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+
+# -------------------------------------------------
+# PUBLIC ACCESSORS
+# -------------------------------------------------
+def get_faiss():
+    return _load("faiss", _import_faiss)
+
+
+def get_pdf_reader():
+    return _load("pypdf", _import_pdf_reader)
+
+
+def get_embedding_model():
+    """Local embedding model (NO API, FREE), built once per process."""
+    return _load("embedding_model", _build_embedding_model)
+
+
+def is_loaded(name):
+    return name in _loaded
+
+
+# -------------------------------------------------
+# ENCODING
+# -------------------------------------------------
+@timed("embed")
+def encode(texts, batch_size=64):
+    """Unit-length float32 embeddings, so L2 distance maps to cosine similarity.
+
+    ``texts`` may be a generator; it is consumed ``batch_size`` items at a time.
+    """
+    import numpy as np
+
+    model = get_embedding_model()
+    texts = iter(texts)
+    batches = []
+
+    while True:
+        batch = list(itertools.islice(texts, batch_size))
+        if not batch:
+            break
+        batches.append(np.asarray(
+            model.encode(batch, batch_size=batch_size, normalize_embeddings=True),
+            dtype="float32"
+        ))
+
+    if not batches:
+        dim = model.get_sentence_embedding_dimension()
+        return np.zeros((0, dim), dtype="float32")
+    return np.vstack(batches)
+
+
+class EmbeddingCache(LRUCache):
+    """Bounded LRU of chunk-text hash -> embedding, shared by the process."""
+
+    def __init__(self, max_entries=EMBEDDING_CACHE_MAX_ENTRIES):
+        super().__init__(max_entries)
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+embedding_cache = EmbeddingCache()
+
+
+def encode_cached(texts, batch_size=64):
+    """Like encode(), but only chunks not seen before go through the model."""
+    import numpy as np
+
+    texts = iter(texts)
+    batches = []
+
+    while True:
+        batch = list(itertools.islice(texts, batch_size))
+        if not batch:
+            break
+
+        keys = [embedding_cache.key(t) for t in batch]
+        vectors = [embedding_cache.get(k) for k in keys]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+
+        if missing:
+            fresh = encode((batch[i] for i in missing), batch_size)
+            for i, vector in zip(missing, fresh):
+                embedding_cache.put(keys[i], vector)
+                vectors[i] = vector
+
+        batches.append(np.vstack(vectors))
+
+    if not batches:
+        return encode([])
+    return np.vstack(batches)
+
+
+class QueryEmbeddingBatcher:
+    """Collects queries from concurrent sessions and embeds them in one call.
+
+    A query is encoded as soon as the model is free; queries that arrive
+    while an encode runs go together in the next call. ``window_ms`` > 0
+    additionally holds each batch open that long for more queries.
+    """
+
+    def __init__(self, window_ms=QUERY_BATCH_WINDOW_MS, max_size=QUERY_BATCH_MAX_SIZE):
+        self.window = window_ms / 1000.0
+        self.max_size = max_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="query-embedder", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        # Whatever queued up during the previous encode
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = encode(texts)
+                for (_, future), vector in zip(batch, vectors):
+                    future.set_result(vector)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def submit(self, text):
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text):
+        return self.submit(text).result()
+
+
+_query_batcher = QueryEmbeddingBatcher()
+
+
+def embed_query(text):
+    return _query_batcher.embed(text)
+
+
+# -------------------------------------------------
+# WARM-UP
+# -------------------------------------------------
+def warm_up():
+    get_pdf_reader()
+    get_faiss()
+    get_embedding_model()
+
+
+def start_background_warm_up():
+    """Load the ML stack in a daemon thread; safe to call on every rerun."""
+    global _warmup_thread
+
+    # Checked without the lock: reruns after the first never wait on anything
+    if _warmup_thread is not None:
+        return _warmup_thread
+
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(
+                target=warm_up, name="ml-warmup", daemon=True
+            )
+            _warmup_thread.start()
+
+    return _warmup_thread
+
+
+# -------------------------------------------------
+# LOAD-TIME REPORT
+# -------------------------------------------------
+def get_load_report():
+    """Seconds spent loading each component, checked against the budget."""
+    total = sum(_load_times.values())
+    return {
+        "components": dict(_load_times),
+        "total_seconds": total,
+        "budget_seconds": ML_LOAD_BUDGET_SECONDS,
+        "within_budget": all(t <= ML_LOAD_BUDGET_SECONDS for t in _load_times.values())
+    }
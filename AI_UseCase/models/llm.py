@@ -1,17 +1,221 @@
-import os
-import sys
-from langchain_groq import ChatGroq
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import re
+import time
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+
+from config.config import (
+    LLM_BACKEND,
+    LLM_MODEL_NAME,
+    LLM_TEMPERATURE,
+    LLM_MAX_TOKENS,
+    LLM_MAX_CONCURRENCY,
+    LLM_QUEUE_TIMEOUT_SECONDS,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_STUB_TOKEN_DELAY_MS,
+    get_secret
+)
+from utils.metrics import span
+from utils.answer_cache import normalize_query
+from utils.lru import LRUCache
+
+SYSTEM_PROMPT = (
+    "You are the assistant of a medical clinic. Answer the patient's question "
+    "using only the clinic document excerpts provided. If the excerpts do not "
+    "contain the answer, say you could not find it in the clinic documents. "
+    "Be brief and never give medical advice."
+)
+
+BUSY_MESSAGE = "⚠️ The assistant is busy right now. Please try again in a moment."
+
+
+def build_messages(question, passages):
+    context = "\n\n".join(f"[{i + 1}] {p}" for i, p in enumerate(passages))
+    return [
+        ("system", SYSTEM_PROMPT),
+        ("user", f"Clinic document excerpts:\n{context}\n\nQuestion: {question}"),
+    ]
+
+
+# -------------------------------------------------
+# BACKENDS
+# Anything with a ``name`` and ``stream(messages)`` yielding text pieces.
+# -------------------------------------------------
+class LLMBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def stream(self, messages):
+        """Yield the reply to langchain-style (role, text) messages in pieces."""
+
+
+class GroqBackend(LLMBackend):
+    name = "groq"
+
+    def __init__(self, model=LLM_MODEL_NAME, temperature=LLM_TEMPERATURE, max_tokens=LLM_MAX_TOKENS):
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # One ChatGroq (and its HTTP connection pool) for the whole process
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from langchain_groq import ChatGroq
+
+                    api_key = get_secret("GROQ_API_KEY")
+                    if not api_key:
+                        raise RuntimeError("GROQ_API_KEY is not set")
+                    self._client = ChatGroq(
+                        api_key=api_key,
+                        model=self.model,
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                    )
+        return self._client
+
+    def stream(self, messages):
+        for chunk in self.client.stream(messages):
+            if chunk.content:
+                yield chunk.content
+
+
+class StubBackend(LLMBackend):
+    """Deterministic offline model: quotes the excerpt sentences that share
+    the most words with the question, streamed word by word."""
+
+    name = "stub"
+    _WORD = re.compile(r"[a-z0-9]+")
+    # Sentence ends, but not after titles such as "Dr." or "Mr."
+    _SENTENCE = re.compile(r"(?<![A-Z][a-z]\.)(?<=[.!?])\s+|\s*\n\s*|\s+(?=•)")
+    _STOPWORDS = frozenset(
+        "a an and are at do does for from how i in is it me my of on or the "
+        "to what when where which who with you your".split()
+    )
+
+    def __init__(self, token_delay_ms=LLM_STUB_TOKEN_DELAY_MS, max_sentences=2):
+        self.token_delay = token_delay_ms / 1000
+        self.max_sentences = max_sentences
+
+    def _answer(self, messages):
+        prompt = messages[-1][1]
+        context, _, question = prompt.rpartition("\n\nQuestion: ")
+        wanted = set(self._WORD.findall(question.lower())) - self._STOPWORDS
+
+        sentences = [
+            s.strip(" •")
+            for s in self._SENTENCE.split(re.sub(r"\[\d+\] ", "", context.split("\n", 1)[-1]))
+            if s.strip(" •")
+        ]
+        scored = sorted(
+            ((len(wanted & set(self._WORD.findall(s.lower()))), -i, s) for i, s in enumerate(sentences)),
+            reverse=True
+        )
+        best = [s for overlap, _, s in scored[:self.max_sentences] if overlap]
+
+        if not best:
+            return "I could not find that in the clinic documents."
+        return "According to the clinic documents: " + " ".join(best)
+
+    def stream(self, messages):
+        for word in re.findall(r"\S+\s*", self._answer(messages)):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield word
+
+
+BACKENDS = {"groq": GroqBackend, "stub": StubBackend}
+
+
+# -------------------------------------------------
+# CLIENT
+# -------------------------------------------------
+class LLMClient:
+    """Backend plus response cache and a cap on concurrent generations."""
+
+    def __init__(self, backend, max_concurrency=LLM_MAX_CONCURRENCY,
+                 cache_max_entries=LLM_CACHE_MAX_ENTRIES, queue_timeout=LLM_QUEUE_TIMEOUT_SECONDS):
+        self.backend = backend
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._cache = LRUCache(cache_max_entries)
+
+    def cache_key(self, question, passages):
+        context_hash = hashlib.sha256("\x00".join(passages).encode("utf-8")).hexdigest()
+        prompt = normalize_query(question)
+        raw = "\x00".join([self.backend.name, getattr(self.backend, "model", ""), prompt, context_hash])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def stream_answer(self, question, passages):
+        """Yield the answer in pieces; a cached answer comes back in one piece."""
+        key = self.cache_key(question, passages)
+        cached = self._cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            yield BUSY_MESSAGE
+            return
+
+        pieces = []
+        try:
+            with span("llm"):
+                for piece in self.backend.stream(build_messages(question, passages)):
+                    pieces.append(piece)
+                    yield piece
+        finally:
+            self._slots.release()
+
+        # Only complete answers are cached; an abandoned stream never gets here
+        self._cache.put(key, "".join(pieces))
+
+    def answer(self, question, passages):
+        return "".join(self.stream_answer(question, passages))
+
+    def stats(self):
+        return {"backend": self.backend.name, **self._cache.stats()}
+
+
+_client = None
+_groq_backend = None
+_client_lock = threading.Lock()
+
+
+def _get_groq_backend():
+    global _groq_backend
+
+    with _client_lock:
+        if _groq_backend is None:
+            _groq_backend = GroqBackend()
+        return _groq_backend
+
+
+def get_llm_client():
+    """Process-wide client for LLM_BACKEND ("groq", "stub" or "auto")."""
+    global _client
+
+    if _client is None:
+        name = LLM_BACKEND
+        if name == "auto":
+            name = "groq" if get_secret("GROQ_API_KEY") else "stub"
+        if name not in BACKENDS:
+            raise RuntimeError(f"Unknown LLM_BACKEND: {name}")
+
+        backend = _get_groq_backend() if name == "groq" else BACKENDS[name]()
+        with _client_lock:
+            if _client is None:
+                _client = LLMClient(backend)
+    return _client
 
 
 def get_chatgroq_model():
-    """Initialize and return the Groq chat model"""
+    """The shared Groq chat model (built on first use, then reused)."""
     try:
-        # Initialize the Groq chat model with the API key
-        groq_model = ChatGroq(
-            api_key="",
-            model="",
-        )
-        return groq_model
+        return _get_groq_backend().client
     except Exception as e:
-        raise RuntimeError(f"Failed to initialize Groq model: {str(e)}")
\ No newline at end of file
+        raise RuntimeError(f"Failed to initialize Groq model: {str(e)}")
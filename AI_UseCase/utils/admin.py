@@ -1,50 +1,313 @@
-import sqlite3
-import pandas as pd
-
-DB_NAME = "appointments.db"
+from db.database import get_connection, transaction
+from config.config import ADMIN_PAGE_SIZE
+from utils.availability import availability, check_slot_free, SlotUnavailableError
+from utils.query_cache import VersionedQueryCache
+from utils.metrics import timed
 
 
 # ---------------- GET ALL BOOKINGS ----------------
-def get_all_bookings():
+BOOKING_COLUMNS = [
+    "id", "name", "email", "phone", "booking_type",
+    "date", "time", "status", "created_at"
+]
+
+BOOKINGS_SELECT = """
+    SELECT 
+        b.id,
+        c.name,
+        c.email,
+        c.phone,
+        b.booking_type,
+        b.date,
+        b.time,
+        b.status,
+        b.created_at
+    FROM bookings b
+    JOIN customers c
+    ON b.customer_id = c.customer_id
+"""
+
+# Newest first; id breaks ties between bookings created in the same instant
+BOOKINGS_ORDER = " ORDER BY b.created_at DESC, b.id DESC"
+
+ALL_BOOKINGS_QUERY = BOOKINGS_SELECT + BOOKINGS_ORDER
+
+
+def _filter_clauses(filters):
+    """WHERE clauses and parameters for the admin filters.
+
+    filters keys (all optional): status, service, date_from, date_to
+    (YYYY-MM-DD, inclusive) and customer (matched against name or email).
+    """
+    filters = filters or {}
+    clauses, params = [], []
+
+    if filters.get("status"):
+        clauses.append("b.status = ?")
+        params.append(filters["status"])
+
+    if filters.get("service"):
+        clauses.append("b.booking_type = ?")
+        params.append(filters["service"])
+
+    if filters.get("date_from"):
+        clauses.append("b.date >= ?")
+        params.append(str(filters["date_from"]))
+
+    if filters.get("date_to"):
+        clauses.append("b.date <= ?")
+        params.append(str(filters["date_to"]))
+
+    customer = (filters.get("customer") or "").strip()
+    if customer:
+        clauses.append("(c.name LIKE ? OR c.email LIKE ?)")
+        params += [f"%{customer}%", f"%{customer.lower()}%"]
+
+    return clauses, params
+
+
+def _filters_key(filters):
+    return tuple(sorted((k, str(v)) for k, v in (filters or {}).items() if v))
+
+
+def _where(clauses):
+    return (" WHERE " + " AND ".join(clauses)) if clauses else ""
+
+
+def _page_query(filters, after):
+    clauses, params = _filter_clauses(filters)
+
+    # Keyset pagination: continue strictly below the last row of the previous page
+    if after:
+        clauses.append("(b.created_at < ? OR (b.created_at = ? AND b.id < ?))")
+        params += [after[0], after[0], after[1]]
+
+    return BOOKINGS_SELECT + _where(clauses) + BOOKINGS_ORDER + " LIMIT ?", params
+
+
+# Page, count and service-list results, patched from the change log on writes
+query_cache = VersionedQueryCache()
+
+
+def _matches(filters, booking_type, date, status):
+    """Python twin of _filter_clauses for the booking columns.
+
+    None when a customer filter is set, since LIKE on the joined
+    name/email is left to SQL.
+    """
+    filters = filters or {}
+
+    if filters.get("customer"):
+        return None
+    if filters.get("status") and status != filters["status"]:
+        return False
+    if filters.get("service") and booking_type != filters["service"]:
+        return False
+    if filters.get("date_from") and (date or "") < str(filters["date_from"]):
+        return False
+    if filters.get("date_to") and (date or "") > str(filters["date_to"]):
+        return False
+    return True
+
+
+def _current_rows(booking_ids):
+    """Joined rows of the given bookings by id; deleted bookings are absent."""
+    ids = list(booking_ids)
+    rows = {}
+
+    # Stay under SQLite's bound-parameter limit
+    for start in range(0, len(ids), 500):
+        batch = ids[start:start + 500]
+        sql = BOOKINGS_SELECT + f" WHERE b.id IN ({','.join('?' * len(batch))})"
+        for row in get_connection().execute(sql, batch):
+            rows[row[0]] = row
+
+    return rows
+
+
+def _fetch_page(filters, after, page_size):
+    sql, params = _page_query(filters, after)
+    # Fetch one extra row to know whether another page exists
+    rows = get_connection().execute(sql, params + [page_size + 1]).fetchall()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = (last[8], last[0])
+
+    return rows, next_cursor
+
+
+def _refresh_page(filters, after, page, changes):
+    """Patch a cached page in place, or None when its membership may have changed."""
+    if (filters or {}).get("customer"):
+        return None
+
+    rows, next_cursor = page
+    rows = list(rows)
+    positions = {row[0]: i for i, row in enumerate(rows)}
+    last_key = (rows[-1][8], rows[-1][0]) if rows else None
+    current = _current_rows(changes)
+
+    for booking_id, (old_exists, old_type, old_date, old_status) in changes.items():
+        row = current.get(booking_id)
+        now = row is not None and _matches(filters, row[4], row[5], row[7])
+
+        if booking_id in positions:
+            old = rows[positions[booking_id]]
+            if not now or (row[8], row[0]) != (old[8], old[0]):
+                return None
+            rows[positions[booking_id]] = row
+            continue
+
+        key = (row[8], row[0]) if row else None
+        if now and (after is None or key < tuple(after)) and (next_cursor is None or key > last_key):
+            return None
+
+        # A row leaving the filter below this page may have been all the next page had
+        was = bool(old_exists) and _matches(filters, old_type, old_date, old_status)
+        if was and not now and next_cursor is not None and (key is None or key < last_key):
+            return None
+
+    return rows, next_cursor
+
+
+@timed("db.read")
+def get_bookings_page(filters=None, after=None, page_size=ADMIN_PAGE_SIZE):
+    """One page of bookings, newest first.
+
+    after is the cursor returned for the previous page. Returns
+    (DataFrame, next cursor), the cursor being None on the last page.
+    """
+    import pandas as pd
+
+    key = ("page", _filters_key(filters), tuple(after) if after else None, page_size)
+
+    try:
+        rows, next_cursor = query_cache.get(
+            key,
+            lambda: _fetch_page(filters, after, page_size),
+            lambda page, changes: _refresh_page(filters, after, page, changes)
+        )
+    except Exception as e:
+        print("ADMIN ERROR:", e)
+        return pd.DataFrame(columns=BOOKING_COLUMNS), None
+
+    return pd.DataFrame(rows, columns=BOOKING_COLUMNS), next_cursor
+
+
+def _fetch_count(filters):
+    clauses, params = _filter_clauses(filters)
+
+    # The customers join is only needed for the customer filter
+    join = " JOIN customers c ON b.customer_id = c.customer_id" if (filters or {}).get("customer") else ""
+
+    return get_connection().execute(
+        "SELECT COUNT(*) FROM bookings b" + join + _where(clauses), params
+    ).fetchone()[0]
+
+
+def _refresh_count(filters, total, changes):
+    current = _current_rows(changes)
+
+    for booking_id, (old_exists, old_type, old_date, old_status) in changes.items():
+        row = current.get(booking_id)
+        before = bool(old_exists) and _matches(filters, old_type, old_date, old_status)
+        after = row is not None and _matches(filters, row[4], row[5], row[7])
+        if before is None or after is None:
+            return None
+        total += int(bool(after)) - int(bool(before))
+
+    return total
+
+
+@timed("db.read")
+def count_bookings(filters=None):
     try:
-        conn = sqlite3.connect(DB_NAME)
-        query = """
-            SELECT 
-                b.id,
-                c.name,
-                c.email,
-                c.phone,
-                b.booking_type,
-                b.date,
-                b.time,
-                b.status,
-                b.created_at
-            FROM bookings b
-            JOIN customers c
-            ON b.customer_id = c.customer_id
-            ORDER BY b.created_at DESC
-        """
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        return df
+        return query_cache.get(
+            ("count", _filters_key(filters)),
+            lambda: _fetch_count(filters),
+            lambda total, changes: _refresh_count(filters, total, changes)
+        )
+    except Exception as e:
+        print("ADMIN ERROR:", e)
+        return 0
+
+
+def _fetch_services():
+    rows = get_connection().execute(
+        "SELECT DISTINCT booking_type FROM bookings ORDER BY booking_type"
+    ).fetchall()
+    return [row[0] for row in rows if row[0]]
+
+
+def _refresh_services(services, changes):
+    current = _current_rows(changes)
+
+    # Only a booking moving to or from a service can change the list
+    for booking_id, (old_exists, old_type, _, _) in changes.items():
+        row = current.get(booking_id)
+        new_type = row[4] if row else None
+        if old_exists and old_type != new_type:
+            return None
+        if new_type and new_type not in services:
+            return None
+
+    return services
+
+
+def get_booking_services():
+    try:
+        return query_cache.get(("services",), _fetch_services, _refresh_services)
+    except Exception as e:
+        print("ADMIN ERROR:", e)
+        return []
+
+
+def get_all_bookings(filters=None):
+    # pandas is only needed here, keep it off the Chat / Instructions pages
+    import pandas as pd
+
+    clauses, params = _filter_clauses(filters)
+
+    try:
+        return pd.read_sql_query(
+            BOOKINGS_SELECT + _where(clauses) + BOOKINGS_ORDER, get_connection(), params=params
+        )
     except Exception as e:
         print("ADMIN ERROR:", e)
         return pd.DataFrame()
 
 
+def _set_status(conn, booking_id, status):
+    # Read the slot in the same transaction so the availability index stays exact
+    cur = conn.cursor()
+    row = cur.execute(
+        "SELECT booking_type, date, time, status FROM bookings WHERE id = ?",
+        (booking_id,)
+    ).fetchone()
+
+    # Re-confirming must not double-book a slot taken since the cancellation
+    if row and status == "CONFIRMED" and row[3] != "CONFIRMED":
+        check_slot_free(cur, row[0], row[1], row[2])
+
+    cur.execute(
+        "UPDATE bookings SET status = ? WHERE id = ?",
+        (status, booking_id)
+    )
+    return row
+
+
 # ---------------- CANCEL BOOKING ----------------
+@timed("db.write")
 def cancel_booking(booking_id):
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cur = conn.cursor()
-
-        cur.execute(
-            "UPDATE bookings SET status = 'CANCELLED' WHERE id = ?",
-            (booking_id,)
-        )
+        with transaction() as conn:
+            row = _set_status(conn, booking_id, "CANCELLED")
 
-        conn.commit()
-        conn.close()
+        if row:
+            availability.on_status_change(row[0], row[1], row[2], row[3], "CANCELLED")
         return True
     except Exception as e:
         print("CANCEL ERROR:", e)
@@ -52,19 +315,101 @@ def cancel_booking(booking_id):
 
 
 # ---------------- UPDATE BOOKING STATUS ----------------
+@timed("db.write")
 def update_booking_status(booking_id, status):
     try:
-        conn = sqlite3.connect(DB_NAME)
-        cur = conn.cursor()
+        with transaction() as conn:
+            row = _set_status(conn, booking_id, status)
 
-        cur.execute(
-            "UPDATE bookings SET status = ? WHERE id = ?",
-            (status, booking_id)
-        )
-
-        conn.commit()
-        conn.close()
+        if row:
+            availability.on_status_change(row[0], row[1], row[2], row[3], status)
         return True
+    except SlotUnavailableError as e:
+        print("SLOT TAKEN:", e)
+        return False
     except Exception as e:
         print("UPDATE STATUS ERROR:", e)
         return False
+
+
+# ---------------- BULK STATUS UPDATE ----------------
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not found"
+SLOT_TAKEN = "slot taken"
+
+
+def _select_slots(conn, booking_ids=None, filters=None):
+    """(id, booking_type, date, time, status) for the given IDs or filter match."""
+    if booking_ids is not None:
+        rows = []
+        for start in range(0, len(booking_ids), 500):
+            batch = booking_ids[start:start + 500]
+            rows += conn.execute(
+                "SELECT id, booking_type, date, time, status FROM bookings "
+                f"WHERE id IN ({','.join('?' * len(batch))})",
+                batch
+            ).fetchall()
+        return rows
+
+    clauses, params = _filter_clauses(filters)
+    join = " JOIN customers c ON b.customer_id = c.customer_id" if filters.get("customer") else ""
+    return conn.execute(
+        "SELECT b.id, b.booking_type, b.date, b.time, b.status FROM bookings b"
+        + join + _where(clauses),
+        params
+    ).fetchall()
+
+
+@timed("db.write")
+def bulk_update_status(status, booking_ids=None, filters=None):
+    """Set status on many bookings in one transaction.
+
+    Pass booking_ids, or filters (same keys as the dashboard; at least one
+    must be set). Returns {booking_id: UPDATED | UNCHANGED | NOT_FOUND |
+    SLOT_TAKEN}, or None if the transaction failed and nothing changed.
+    """
+    if booking_ids is not None:
+        booking_ids = list(dict.fromkeys(i.strip() for i in booking_ids if i.strip()))
+    elif not any((filters or {}).values()):
+        raise ValueError("A filter is required to update bookings in bulk")
+
+    results = {booking_id: NOT_FOUND for booking_id in booking_ids or []}
+    changed = []
+
+    try:
+        with transaction() as conn:
+            rows = _select_slots(conn, booking_ids, filters)
+            cur = conn.cursor()
+
+            for booking_id, service, day, time, old_status in rows:
+                if old_status == status:
+                    results[booking_id] = UNCHANGED
+                    continue
+
+                if status == "CONFIRMED":
+                    # Re-confirming must not double-book a slot taken since
+                    # the cancellation; earlier rows of this batch count too
+                    try:
+                        check_slot_free(cur, service, day, time)
+                    except SlotUnavailableError:
+                        results[booking_id] = SLOT_TAKEN
+                        continue
+                    cur.execute("UPDATE bookings SET status = ? WHERE id = ?", (status, booking_id))
+
+                results[booking_id] = UPDATED
+                changed.append((booking_id, service, day, time, old_status))
+
+            if status != "CONFIRMED":
+                cur.executemany(
+                    "UPDATE bookings SET status = ? WHERE id = ?",
+                    [(status, row[0]) for row in changed]
+                )
+    except Exception as e:
+        print("BULK UPDATE ERROR:", e)
+        return None
+
+    for _, service, day, time, old_status in changed:
+        availability.on_status_change(service, day, time, old_status, status)
+
+    return results
@@ -0,0 +1,48 @@
+import re
+
+from config.config import ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS
+from utils.lru import LRUCache
+
+# "What services?", "what services" and "  What   services ?? " are one question
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+def normalize_query(query):
+    return _TRAILING_PUNCTUATION.sub("", " ".join(query.lower().split()))
+
+
+class AnswerCache:
+    """Process-wide LRU of answers keyed by (knowledge base cache_key, query).
+
+    The cache_key is a hash of the document set, so answers from older PDFs
+    can never be served for new ones; invalidate_kb() just frees them early.
+    """
+
+    def __init__(self, max_entries=ANSWER_CACHE_MAX_ENTRIES, ttl_seconds=ANSWER_CACHE_TTL_SECONDS):
+        self._answers = LRUCache(max_entries, ttl_seconds=ttl_seconds)
+
+    def get_or_compute(self, kb_key, query, compute):
+        if kb_key is None or self._answers.max_entries <= 0:
+            return compute()
+
+        key = (kb_key, normalize_query(query))
+        answer = self._answers.get(key)
+        if answer is None:
+            answer = compute()
+            self._answers.put(key, answer)
+        return answer
+
+    def invalidate_kb(self, kb_key):
+        self._answers.remove_where(lambda key: key[0] == kb_key)
+
+    def clear(self):
+        self._answers.clear()
+
+    def stats(self):
+        stats = self._answers.stats()
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / total if total else 0.0
+        return stats
+
+
+answer_cache = AnswerCache()
@@ -0,0 +1,237 @@
+import re
+import bisect
+import threading
+from datetime import date as date_cls, datetime, timedelta
+
+from config.config import (
+    SLOT_MINUTES,
+    CLINIC_OPEN_TIME,
+    CLINIC_CLOSE_TIME,
+    CLINIC_CLOSED_WEEKDAYS
+)
+from db.database import get_connection
+
+TIME_PATTERN = re.compile(r"^(\d{1,2})(?::(\d{2}))?\s?(AM|PM|am|pm)?$")
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+DATE_PATTERN = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+# Asking which slots are free, not booking one ("book a slot") or asking
+# when the clinic opens ("what time do you open")
+SLOT_QUERY_PATTERN = re.compile(
+    r"\b(?:free|open|available|vacant)\s+(?:slots?|times?|timings?)\b"
+    r"|\bslots?\s+(?:are\s+|is\s+)?(?:free|open|available|left)\b"
+    r"|\b(?:any|which|what)\s+slots?\b",
+    re.IGNORECASE
+)
+
+
+class SlotUnavailableError(Exception):
+    pass
+
+
+# ---------------- PARSING ----------------
+def parse_time(value):
+    """Minutes since midnight for "10 AM", "10:30pm" or "14:00"; None if invalid."""
+    match = TIME_PATTERN.match(value.strip())
+    if not match:
+        return None
+
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    meridiem = (match.group(3) or "").lower()
+
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def format_time(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def normalize_time(value):
+    minutes = parse_time(value)
+    return format_time(minutes) if minutes is not None else None
+
+
+def service_key(service):
+    return " ".join(service.lower().split())
+
+
+def parse_day(text, today=None):
+    """Date mentioned in a chat message: YYYY-MM-DD, today, tomorrow or a weekday."""
+    today = today or date_cls.today()
+    lowered = text.lower()
+
+    match = DATE_PATTERN.search(text)
+    if match:
+        try:
+            return datetime.strptime(match.group(1), "%Y-%m-%d").date()
+        except ValueError:
+            return None
+
+    if "tomorrow" in lowered:
+        return today + timedelta(days=1)
+    if "today" in lowered:
+        return today
+
+    for i, day in enumerate(WEEKDAYS):
+        if day in lowered:
+            return today + timedelta(days=(i - today.weekday()) % 7)
+
+    return None
+
+
+def is_slot_query(text):
+    return bool(SLOT_QUERY_PATTERN.search(text))
+
+
+def _overlaps(starts, minutes, slot_minutes):
+    # starts is sorted: the only candidates sit in (minutes - slot, minutes + slot)
+    i = bisect.bisect_right(starts, minutes - slot_minutes)
+    return i < len(starts) and starts[i] < minutes + slot_minutes
+
+
+# ---------------- INTERVAL INDEX ----------------
+class AvailabilityIndex:
+    """Taken slot start times per day and service, kept sorted.
+
+    Built from the bookings table on first use and updated by every write
+    in this process, so conflict checks are a bisect instead of a query.
+    """
+
+    def __init__(self, slot_minutes=SLOT_MINUTES):
+        self.slot_minutes = slot_minutes
+        self._slots = {}
+        self._loaded = False
+        # Bumped by every write, so a load that raced one is thrown away
+        self._changes = 0
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        while not self._loaded:
+            with self._lock:
+                seen = self._changes
+
+            rows = get_connection().execute(
+                "SELECT booking_type, date, time FROM bookings WHERE status = 'CONFIRMED'"
+            ).fetchall()
+
+            with self._lock:
+                if not self._loaded and self._changes == seen:
+                    self._slots = {}
+                    for service, day, time in rows:
+                        self._add(service, day, time)
+                    self._loaded = True
+
+    def _add(self, service, day, time):
+        minutes = parse_time(time or "")
+        if minutes is None or not service:
+            return
+        starts = self._slots.setdefault(day, {}).setdefault(service_key(service), [])
+        bisect.insort(starts, minutes)
+
+    def add(self, service, day, time):
+        with self._lock:
+            self._changes += 1
+            if self._loaded:
+                self._add(service, day, time)
+
+    def remove(self, service, day, time):
+        minutes = parse_time(time or "")
+        with self._lock:
+            self._changes += 1
+            starts = self._slots.get(day, {}).get(service_key(service or ""), [])
+            i = bisect.bisect_left(starts, minutes) if minutes is not None else len(starts)
+            if i < len(starts) and starts[i] == minutes:
+                del starts[i]
+
+    def on_status_change(self, service, day, time, old_status, new_status):
+        if old_status == "CONFIRMED" and new_status != "CONFIRMED":
+            self.remove(service, day, time)
+        elif old_status != "CONFIRMED" and new_status == "CONFIRMED":
+            self.add(service, day, time)
+
+    def invalidate(self):
+        with self._lock:
+            self._changes += 1
+            self._loaded = False
+
+    def _taken(self, day, service=None):
+        by_service = self._slots.get(day, {})
+        if service is not None:
+            return by_service.get(service_key(service), [])
+        # No service given: a time is only free if nothing is booked then
+        return sorted(m for starts in by_service.values() for m in starts)
+
+    def is_free(self, service, day, time):
+        self._ensure_loaded()
+        minutes = parse_time(time)
+        with self._lock:
+            return not _overlaps(self._taken(day, service), minutes, self.slot_minutes)
+
+    def free_slots(self, day, service=None):
+        """Free "HH:MM" slot starts within opening hours (none on closed days)."""
+        if isinstance(day, str):
+            day = datetime.strptime(day, "%Y-%m-%d").date()
+        if day.weekday() in CLINIC_CLOSED_WEEKDAYS:
+            return []
+
+        self._ensure_loaded()
+        opening = parse_time(CLINIC_OPEN_TIME)
+        closing = parse_time(CLINIC_CLOSE_TIME)
+
+        with self._lock:
+            taken = list(self._taken(day.isoformat(), service))
+
+        return [
+            format_time(m)
+            for m in range(opening, closing - self.slot_minutes + 1, self.slot_minutes)
+            if not _overlaps(taken, m, self.slot_minutes)
+        ]
+
+
+availability = AvailabilityIndex()
+
+
+# ---------------- TRANSACTIONAL GUARD ----------------
+# Unary + keeps SQLite on the (date, time) index rather than walking every
+# confirmed booking through the (status, created_at, id) one
+SLOT_BOOKINGS_QUERY = "SELECT booking_type, time FROM bookings WHERE date = ? AND +status = 'CONFIRMED'"
+
+
+def check_slot_free(cur, service, day, time, slot_minutes=SLOT_MINUTES):
+    """Raise SlotUnavailableError if the slot overlaps a confirmed booking.
+
+    Must run inside the write transaction (BEGIN IMMEDIATE) that inserts the
+    booking: the lock is already held, so no other session can take the slot
+    between this check and the INSERT.
+    """
+    minutes = parse_time(time)
+    cur.execute(SLOT_BOOKINGS_QUERY, (day,))
+
+    key = service_key(service)
+    starts = sorted(
+        m for other, t in cur.fetchall()
+        if other and service_key(other) == key
+        for m in [parse_time(t or "")] if m is not None
+    )
+
+    if _overlaps(starts, minutes, slot_minutes):
+        raise SlotUnavailableError(f"{service} at {time} on {day} is already booked")
+
+
+def describe_free_slots(day, service=None, limit=12):
+    slots = availability.free_slots(day, service)
+    label = f" for {service}" if service else ""
+
+    if not slots:
+        return f"❌ No free slots{label} on {day.strftime('%A, %Y-%m-%d')}."
+
+    shown = ", ".join(slots[:limit]) + (" …" if len(slots) > limit else "")
+    return f"🗓️ **Free slots{label} on {day.strftime('%A, %Y-%m-%d')}:**\n{shown}"
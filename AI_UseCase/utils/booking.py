@@ -1,9 +1,21 @@
-import sqlite3
-import uuid
 import re
 from datetime import datetime
 
-DB_NAME = "appointments.db"
+from db.database import get_connection, transaction
+from db.migrations import migrate
+from db.models import normalize_email, upsert_customer
+from config.config import CLINIC_CLOSED_WEEKDAYS
+from utils.availability import (
+    availability,
+    check_slot_free,
+    describe_free_slots,
+    normalize_time,
+    SlotUnavailableError
+)
+from utils.emailer import build_confirmation_email
+from utils.ids import new_booking_id
+from utils.outbox import enqueue_email, notify_outbox
+from utils.metrics import timed
 
 REQUIRED_FIELDS = ["name", "email", "phone", "service", "date", "time"]
 
@@ -18,33 +30,7 @@ QUESTIONS = {
 
 # ---------------- DATABASE INIT ----------------
 def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS customers (
-            customer_id TEXT PRIMARY KEY,
-            name TEXT,
-            email TEXT,
-            phone TEXT
-        )
-    """)
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS bookings (
-            id TEXT PRIMARY KEY,
-            customer_id TEXT,
-            booking_type TEXT,
-            date TEXT,
-            time TEXT,
-            status TEXT,
-            created_at TEXT,
-            FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
-        )
-    """)
-
-    conn.commit()
-    conn.close()
+    migrate()
 
 
 # ---------------- BOOKING STATE ----------------
@@ -80,7 +66,9 @@ def validate_input(field, value):
             return False, "❌ Please enter date in YYYY-MM-DD format."
 
     if field == "time":
-        if not re.match(r"^\d{1,2}(:\d{2})?\s?(AM|PM|am|pm)?$", value):
+        # Stored as HH:MM so the same slot always compares equal
+        value = normalize_time(value)
+        if value is None:
             return False, "❌ Please enter a valid time (e.g., 10 AM or 14:00)."
 
     if field == "phone":
@@ -105,66 +93,100 @@ def update_booking(booking, user_input):
         booking["_error"] = result
         return booking
 
+    if field == "date":
+        day = datetime.strptime(result, "%Y-%m-%d").date()
+        if day.weekday() in CLINIC_CLOSED_WEEKDAYS:
+            booking["_error"] = "❌ The clinic is closed on that day. Please choose another date."
+            return booking
+
+    if field == "time" and not availability.is_free(booking["service"], booking["date"], result):
+        day = datetime.strptime(booking["date"], "%Y-%m-%d").date()
+        booking["_error"] = (
+            f"❌ {result} is already booked.\n\n"
+            + describe_free_slots(day, booking["service"])
+        )
+        return booking
+
     booking[field] = result
     booking.pop("_error", None)
     return booking
 
 
 # ---------------- SAVE BOOKING ----------------
+@timed("db.write")
 def save_booking(booking):
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        cur = conn.cursor()
-
-        customer_id = "CUS-" + uuid.uuid4().hex[:6].upper()
-
-        cur.execute(
-            "INSERT INTO customers VALUES (?, ?, ?, ?)",
-            (customer_id, booking["name"], booking["email"], booking["phone"])
-        )
+    """New booking ID, or None on a database error.
 
-        booking_id = "APT-" + uuid.uuid4().hex[:6].upper()
-
-        cur.execute(
-            "INSERT INTO bookings VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (
-                booking_id,
-                customer_id,
-                booking["service"],
-                booking["date"],
-                booking["time"],
-                "CONFIRMED",
-                datetime.now().isoformat()
-            )
-        )
+    Raises SlotUnavailableError when another booking took the slot since it
+    was checked; the caller should ask for a different time.
+    """
+    try:
+        with transaction() as conn:
+            booking_id = _insert_booking(conn.cursor(), booking)
 
-        conn.commit()
-        conn.close()
+        availability.add(booking["service"], booking["date"], booking["time"])
+        notify_outbox()
         return booking_id
 
+    except SlotUnavailableError:
+        # The in-memory index missed that booking (made by another process,
+        # or while it was loading): reload it from the table on next use
+        availability.invalidate()
+        raise
+
     except Exception as e:
         print("DB ERROR:", e)
         return None
 
 
+def _insert_booking(cur, booking):
+    # Runs under BEGIN IMMEDIATE: no other session can insert in between
+    check_slot_free(cur, booking["service"], booking["date"], booking["time"])
+
+    # Returning patients keep their existing customer record
+    customer_id = upsert_customer(cur, booking["name"], booking["email"], booking["phone"])
+
+    booking_id = new_booking_id()
+
+    cur.execute(
+        "INSERT INTO bookings VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            booking_id,
+            customer_id,
+            booking["service"],
+            booking["date"],
+            booking["time"],
+            "CONFIRMED",
+            datetime.now().isoformat()
+        )
+    )
+
+    # Confirmation email is queued in the same transaction as the booking
+    subject, body = build_confirmation_email(
+        booking["name"], booking_id, booking["service"], booking["date"], booking["time"]
+    )
+    enqueue_email(cur, booking_id, booking["email"], subject, body)
+
+    return booking_id
+
+
 # ---------------- BOOKING RETRIEVAL ----------------
+BOOKINGS_BY_EMAIL_QUERY = """
+    SELECT 
+        b.id,
+        b.booking_type,
+        b.date,
+        b.time,
+        b.status
+    FROM bookings b
+    JOIN customers c ON b.customer_id = c.customer_id
+    WHERE c.email = ?
+    ORDER BY b.created_at DESC
+"""
+
+
+@timed("db.read")
 def get_bookings_by_email(email):
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT 
-            b.id,
-            b.booking_type,
-            b.date,
-            b.time,
-            b.status
-        FROM bookings b
-        JOIN customers c ON b.customer_id = c.customer_id
-        WHERE c.email = ?
-        ORDER BY b.created_at DESC
-    """, (email,))
-
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    cur = get_connection().cursor()
+    cur.execute(BOOKINGS_BY_EMAIL_QUERY, (normalize_email(email),))
+    return cur.fetchall()
@@ -1,22 +1,17 @@
-import streamlit as st
+import queue
 import smtplib
+import threading
+from contextlib import contextmanager
 from email.message import EmailMessage
 
-SMTP_EMAIL = st.secrets["SMTP_EMAIL"]
-SMTP_PASSWORD = st.secrets["SMTP_PASSWORD"]
+from config.config import SMTP_HOST, SMTP_PORT, SMTP_USE_SSL, SMTP_TIMEOUT_SECONDS, get_secret
+from utils.metrics import timed
 
 
-def send_confirmation_email(to_email, name, booking_id, service, date, time):
-    try:
-        print("📧 Attempting to send email to:", to_email)
-
-        msg = EmailMessage()
-        msg["Subject"] = "Appointment Confirmation"
-        msg["From"] = SMTP_EMAIL
-        msg["To"] = to_email
-
-        msg.set_content(
-            f"""
+# ---------------- MESSAGE ----------------
+def build_confirmation_email(name, booking_id, service, date, time):
+    subject = "Appointment Confirmation"
+    body = f"""
 Hello {name},
 
 Your appointment has been successfully confirmed.
@@ -33,12 +28,118 @@ Thank you for choosing our clinic.
 Regards,
 ABC Health Care Clinic
 """
-        )
+    return subject, body
+
+
+def make_message(sender, to_email, subject, body):
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg["From"] = sender
+    msg["To"] = to_email
+    msg.set_content(body)
+    return msg
+
+
+# ---------------- SMTP POOL ----------------
+class SMTPConnectionPool:
+    """Keeps authenticated SMTP connections open and reuses them.
+
+    A connection that the server has dropped is replaced transparently
+    (one reconnect per send).
+    """
+
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, use_ssl=SMTP_USE_SSL,
+                 username=None, password=None, size=1, timeout=SMTP_TIMEOUT_SECONDS):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._slots = threading.Semaphore(size)
+
+    def _connect(self):
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self):
+        with self._slots:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                server = self._connect()
+
+            try:
+                yield server
+            except Exception:
+                self._close(server)
+                raise
+            else:
+                self._idle.put_nowait(server)
+
+    def send(self, msg):
+        try:
+            with self.connection() as server:
+                server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Idle connection timed out on the server side: reconnect once
+            with self.connection() as server:
+                server.send_message(msg)
+
+    def close(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SMTPConnectionPool(
+                username=get_secret("SMTP_EMAIL"),
+                password=get_secret("SMTP_PASSWORD")
+            )
+        return _pool
+
+
+def sender_address():
+    return get_secret("SMTP_EMAIL") or "no-reply@localhost"
+
+
+# ---------------- SEND ----------------
+@timed("email")
+def send_email(to_email, subject, body, pool=None):
+    pool = pool or get_smtp_pool()
+    pool.send(make_message(sender_address(), to_email, subject, body))
+
+
+def send_confirmation_email(to_email, name, booking_id, service, date, time):
+    try:
+        print("📧 Attempting to send email to:", to_email)
 
-        # Gmail SMTP (SSL)
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(SMTP_EMAIL, SMTP_PASSWORD)
-            server.send_message(msg)
+        subject, body = build_confirmation_email(name, booking_id, service, date, time)
+        send_email(to_email, subject, body)
 
         print("✅ Email sent successfully")
         return True
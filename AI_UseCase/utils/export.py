@@ -0,0 +1,119 @@
+"""Streaming bookings export.
+
+Rows go from a SQLite cursor to the output file in fixed-size batches, so
+memory stays flat however many bookings exist.
+
+    python -m utils.export --format parquet --from 2026-01-01 --out bookings.parquet
+"""
+import argparse
+import csv
+import io
+import os
+import tempfile
+
+from config.config import EXPORT_BATCH_SIZE
+from db.database import get_connection
+from utils.admin import BOOKING_COLUMNS, BOOKINGS_SELECT, BOOKINGS_ORDER, _filter_clauses, _where
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+
+# ---------------- READ ----------------
+def iter_booking_batches(filters=None, batch_size=EXPORT_BATCH_SIZE):
+    """Yield lists of at most batch_size booking rows, newest first."""
+    clauses, params = _filter_clauses(filters)
+    cur = get_connection().cursor()
+
+    try:
+        cur.execute(BOOKINGS_SELECT + _where(clauses) + BOOKINGS_ORDER, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cur.close()
+
+
+# ---------------- WRITE ----------------
+def write_csv(fileobj, filters=None, batch_size=EXPORT_BATCH_SIZE):
+    """Write CSV to a binary file object; returns the number of rows."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(BOOKING_COLUMNS)
+
+    count = 0
+    for rows in iter_booking_batches(filters, batch_size):
+        writer.writerows(rows)
+        count += len(rows)
+
+    # Hand the file back to the caller still open
+    text.flush()
+    text.detach()
+    return count
+
+
+def write_parquet(fileobj, filters=None, batch_size=EXPORT_BATCH_SIZE):
+    """Write Parquet, one row group per batch; returns the number of rows."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.string()) for name in BOOKING_COLUMNS])
+    count = 0
+
+    with pq.ParquetWriter(fileobj, schema) as writer:
+        for rows in iter_booking_batches(filters, batch_size):
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=pa.string()) for col in columns], schema=schema
+            ))
+            count += len(rows)
+
+    return count
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet}
+
+
+def export_bookings(fmt="csv", filters=None, batch_size=EXPORT_BATCH_SIZE):
+    """Export to a temporary file; returns (path, row count).
+
+    The caller owns the file and should delete it once it has been served.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    fd, path = tempfile.mkstemp(prefix="bookings-", suffix=EXPORT_FORMATS[fmt][1])
+    try:
+        with os.fdopen(fd, "wb") as f:
+            count = WRITERS[fmt](f, filters, batch_size)
+    except Exception:
+        os.remove(path)
+        raise
+
+    return path, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export bookings")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="csv")
+    parser.add_argument("--from", dest="date_from", help="first appointment date, YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", help="last appointment date, YYYY-MM-DD")
+    parser.add_argument("--status", help="e.g. CONFIRMED")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--out", required=True, help="output file")
+    args = parser.parse_args()
+
+    filters = {"date_from": args.date_from, "date_to": args.date_to, "status": args.status}
+
+    with open(args.out, "wb") as f:
+        count = WRITERS[args.format](f, filters, args.batch_size)
+
+    print(f"exported {count} bookings to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Time-ordered IDs for bookings and customers, e.g. APT-01JA8Z3Q5T9XKQ0N4W2C7VEMBD.
+
+ULID layout after the prefix: 48-bit millisecond timestamp + 80 random
+bits, in Crockford base32 (26 characters, sorting as the timestamp). New
+rows therefore land at the end of the primary-key index, and two IDs only
+collide if they share the millisecond and all 80 random bits. IDs made
+by this process within one millisecond are strictly increasing.
+"""
+import os
+import time
+import threading
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+BOOKING_PREFIX = "APT-"
+CUSTOMER_PREFIX = "CUS-"
+
+_RANDOM_BITS = 80
+_lock = threading.Lock()
+_last_ms = -1
+_last_random = 0
+
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        chars.append(ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def _next_random(ms):
+    global _last_ms, _last_random
+
+    with _lock:
+        if ms <= _last_ms:
+            # Same millisecond (or the clock stepped back): count up from the last ID
+            ms = _last_ms
+            _last_random += 1
+            if _last_random >> _RANDOM_BITS:
+                # 2^80 IDs in one millisecond; borrow the next one
+                ms += 1
+                _last_random = int.from_bytes(os.urandom(10), "big")
+        else:
+            _last_random = int.from_bytes(os.urandom(10), "big")
+        _last_ms = ms
+        return ms, _last_random
+
+
+def new_id(prefix, at=None):
+    """prefix + ULID for now, or for the datetime ``at`` (e.g. imported history)."""
+    if at is None:
+        ms, random = _next_random(time.time_ns() // 1_000_000)
+    else:
+        ms = max(int(at.timestamp() * 1000), 0)
+        random = int.from_bytes(os.urandom(10), "big")
+    return prefix + _encode(ms, 10) + _encode(random, 16)
+
+
+def new_booking_id(at=None):
+    return new_id(BOOKING_PREFIX, at)
+
+
+def new_customer_id():
+    return new_id(CUSTOMER_PREFIX)
+
@@ -0,0 +1,229 @@
+"""Bulk import of bookings from CSV, e.g. history from a previous system.
+
+    python -m utils.importer bookings.csv [--rejects rejects.csv] [--batch-size N] [--dry-run]
+
+Required columns: name, email, phone, service, date, time. Optional: id
+(kept, so re-running an import skips what is already there), status
+(CONFIRMED or CANCELLED, default CONFIRMED) and created_at (ISO format).
+
+Rows are validated with the chat rules (utils.booking.validate_input) and
+written in chunked transactions with executemany. Imported history is not
+checked against the clinic calendar and sends no confirmation emails.
+"""
+import argparse
+import csv
+import sys
+from datetime import datetime
+
+from config.config import IMPORT_BATCH_SIZE
+from db.database import transaction
+from db.models import normalize_email
+from utils.ids import new_booking_id, new_customer_id
+from utils.availability import availability
+from utils.booking import REQUIRED_FIELDS, validate_input
+
+STATUSES = ("CONFIRMED", "CANCELLED")
+
+
+# ---------------- VALIDATION ----------------
+def validate_row(row):
+    """(booking, None) for a valid CSV row, else (None, reason)."""
+    booking = {}
+
+    for field in REQUIRED_FIELDS:
+        value = (row.get(field) or "").strip()
+        if not value:
+            return None, f"missing {field}"
+
+        is_valid, result = validate_input(field, value)
+        if not is_valid:
+            return None, f"{field}: " + result.replace("❌", "").strip()
+        booking[field] = result
+
+    booking["email"] = normalize_email(booking["email"])
+    booking["id"] = (row.get("id") or "").strip() or None
+
+    status = (row.get("status") or "CONFIRMED").strip().upper()
+    if status not in STATUSES:
+        return None, f"status: must be one of {', '.join(STATUSES)}"
+    booking["status"] = status
+
+    created_at = (row.get("created_at") or "").strip()
+    if created_at:
+        try:
+            datetime.fromisoformat(created_at)
+        except ValueError:
+            return None, "created_at: not an ISO date/time"
+    booking["created_at"] = created_at or datetime.now().isoformat()
+
+    return booking, None
+
+
+# ---------------- WRITE ----------------
+def _in_chunks(values, size=500):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _existing(cur, table, column, values):
+    found = set()
+    for chunk in _in_chunks(values):
+        cur.execute(
+            f"SELECT {column} FROM {table} WHERE {column} IN ({','.join('?' * len(chunk))})",
+            chunk
+        )
+        found.update(row[0] for row in cur.fetchall())
+    return found
+
+
+def _write_batch(cur, bookings):
+    """Insert one batch; returns [(booking, reason)] for the rows skipped."""
+    rejected = []
+
+    # Rows keeping an ID from the old system: skip what is already imported
+    kept_ids = [b["id"] for b in bookings if b["id"]]
+    taken = _existing(cur, "bookings", "id", kept_ids)
+    fresh = []
+    for booking in bookings:
+        if booking["id"] in taken:
+            rejected.append((booking, "duplicate id"))
+        else:
+            if booking["id"]:
+                taken.add(booking["id"])
+            fresh.append(booking)
+
+    # Customers: the last row per email wins for name and phone
+    latest = {b["email"]: b for b in fresh}
+    known = {}
+    for chunk in _in_chunks(latest):
+        cur.execute(
+            f"SELECT email, customer_id FROM customers WHERE email IN ({','.join('?' * len(chunk))})",
+            chunk
+        )
+        known.update(cur.fetchall())
+
+    new_emails = [email for email in latest if email not in known]
+    new_ids = [new_customer_id() for _ in new_emails]
+    cur.executemany(
+        "INSERT INTO customers (customer_id, name, email, phone) VALUES (?, ?, ?, ?)",
+        [
+            (customer_id, latest[email]["name"], email, latest[email]["phone"])
+            for customer_id, email in zip(new_ids, new_emails)
+        ]
+    )
+    cur.executemany(
+        "UPDATE customers SET name = ?, phone = ? WHERE customer_id = ?",
+        [(latest[email]["name"], latest[email]["phone"], customer_id) for email, customer_id in known.items()]
+    )
+    known.update(zip(new_emails, new_ids))
+
+    cur.executemany(
+        """
+        INSERT INTO bookings (id, customer_id, booking_type, date, time, status, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                # New IDs carry the original created_at, so key order matches it
+                b["id"] or new_booking_id(datetime.fromisoformat(b["created_at"])),
+                known[b["email"]], b["service"],
+                b["date"], b["time"], b["status"], b["created_at"]
+            )
+            for b in fresh
+        ]
+    )
+
+    return rejected
+
+
+def import_bookings(rows, batch_size=IMPORT_BATCH_SIZE, on_reject=None, dry_run=False):
+    """Import an iterable of CSV dict rows in transactions of batch_size rows.
+
+    on_reject(line, row, reason) is called for every row not imported;
+    line counts the header as line 1. Returns {"read", "imported", "rejected"}.
+    """
+    stats = {"read": 0, "imported": 0, "rejected": 0}
+    batch = []
+
+    def reject(line, row, reason):
+        stats["rejected"] += 1
+        if on_reject:
+            on_reject(line, row, reason)
+
+    def flush():
+        if dry_run:
+            stats["imported"] += len(batch)
+        else:
+            with transaction() as conn:
+                skipped = _write_batch(conn.cursor(), [booking for _, _, booking in batch])
+
+            stats["imported"] += len(batch) - len(skipped)
+            lines = {id(booking): (line, row) for line, row, booking in batch}
+            for booking, reason in skipped:
+                reject(*lines[id(booking)], reason)
+        batch.clear()
+
+    for line, row in enumerate(rows, start=2):
+        stats["read"] += 1
+        booking, reason = validate_row(row)
+
+        if booking is None:
+            reject(line, row, reason)
+            continue
+
+        batch.append((line, row, booking))
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    if not dry_run:
+        availability.invalidate()
+
+    return stats
+
+
+def main():
+    from db.migrations import migrate
+
+    parser = argparse.ArgumentParser(description="Import bookings from CSV")
+    parser.add_argument("csv_file")
+    parser.add_argument("--rejects", help="write rejected rows with their reason to this CSV")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="validate without saving")
+    args = parser.parse_args()
+
+    migrate()
+
+    with open(args.csv_file, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = [field for field in REQUIRED_FIELDS if field not in (reader.fieldnames or [])]
+        if missing:
+            sys.exit(f"missing columns: {', '.join(missing)}")
+
+        rejects_file = open(args.rejects, "w", newline="", encoding="utf-8") if args.rejects else None
+        try:
+            writer = None
+            if rejects_file:
+                writer = csv.writer(rejects_file)
+                writer.writerow(["line", "reason"] + reader.fieldnames)
+
+            def on_reject(line, row, reason):
+                if writer:
+                    writer.writerow([line, reason] + [row.get(name, "") for name in reader.fieldnames])
+                else:
+                    print(f"line {line}: {reason}")
+
+            stats = import_bookings(reader, args.batch_size, on_reject, args.dry_run)
+        finally:
+            if rejects_file:
+                rejects_file.close()
+
+    verb = "would import" if args.dry_run else "imported"
+    print(f"read {stats['read']} rows, {verb} {stats['imported']}, rejected {stats['rejected']}")
+
+
+if __name__ == "__main__":
+    main()
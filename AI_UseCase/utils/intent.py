@@ -1,15 +1,198 @@
+import re
+import threading
+
+from config.config import INTENT_ROUTER, INTENT_MIN_SIMILARITY, INTENT_CACHE_MAX_ENTRIES
+from models.embeddings import encode, is_loaded
+from utils.metrics import timed
+from utils.lru import LRUCache
+
+# -------------------------------------------------
+# Intents are picked by cosine similarity to the mean embedding of a few
+# example utterances each, with the same MiniLM model as the knowledge base.
+# Until that model is loaded (or when it is unsure) one compiled keyword
+# pattern decides instead.
+# -------------------------------------------------
+BOOK = "book"
+LOOKUP = "lookup"
+CANCEL = "cancel"
+SERVICES = "services"
+DOCTORS = "doctors"
+HOURS = "hours"
+ADDRESS = "address"
+OTHER = "other"
+
+EXAMPLES = {
+    BOOK: [
+        "I want to book an appointment",
+        "book a consultation with the doctor",
+        "can I schedule a visit for tomorrow",
+        "I need to see a cardiologist",
+        "make an appointment for me",
+        "reserve a slot with the dermatologist",
+    ],
+    LOOKUP: [
+        "show my bookings",
+        "what appointments do I have",
+        "check my appointment status",
+        "find my booking",
+        "did my booking go through",
+    ],
+    CANCEL: [
+        "cancel my appointment",
+        "I can't make it, please cancel",
+        "call off my booking",
+        "I want to cancel the consultation",
+    ],
+    SERVICES: [
+        "what services do you offer",
+        "which treatments are available",
+        "do you do diabetes management",
+        "list the services at the clinic",
+    ],
+    DOCTORS: [
+        "which doctors are available",
+        "who is the cardiologist",
+        "tell me about the doctors",
+        "when does the dermatologist see patients",
+    ],
+    HOURS: [
+        "what are your working hours",
+        "when is the clinic open",
+        "are you open on sunday",
+        "what time do you close",
+    ],
+    ADDRESS: [
+        "where is the clinic",
+        "what is your address",
+        "how do I get to the clinic",
+        "clinic location please",
+    ],
+    OTHER: [
+        "hello",
+        "thank you",
+        "John Smith",
+        "john.smith@gmail.com",
+        "9876543210",
+        "2025-03-14",
+        "10 AM",
+        "yes",
+    ],
+}
+
+# One alternation, most specific intents first: "cancel my appointment" must
+# not be read as a booking just because it says "appointment"
+KEYWORD_PATTERN = re.compile(
+    r"(?P<cancel>\b(?:cancel\w*|call off)\b)"
+    r"|(?P<lookup>\bmy (?:booking|appointment|reservation)s?\b)"
+    r"|(?P<book>\b(?:book\w*|appointment\w*|schedul\w*|reserv\w*|consult(?:ation)?)\b)"
+    r"|(?P<doctors>\b(?:doctors?|dr\.?|physician|specialist\w*|cardiologist|dermatologist)\b)"
+    r"|(?P<hours>\b(?:hours|timings?|open(?!\s+(?:slots?|times?)\b)\w*|clos(?:e|ed|ing))\b)"
+    r"|(?P<address>\b(?:address|located|location|directions?|where)\b)"
+    r"|(?P<services>\b(?:services?|treatments?|facilit\w+)\b)"
+)
+KEYWORD_PRIORITY = [CANCEL, LOOKUP, BOOK, DOCTORS, HOURS, ADDRESS, SERVICES]
+
+QUESTION_START = re.compile(
+    r"^(?:what|which|who|whom|whose|when|where|why|how|is|are|do|does|can|could|will|tell me|show me)\b"
+)
+
+INFO_WORDS = re.compile(r"\b(?:services|timings?|hours|address|doctors)\b")
+
+
+def normalize_utterance(text):
+    return " ".join(text.lower().split())
+
+
+def keyword_intent(text):
+    """Intent from the keyword pattern alone (no model)."""
+    found = {m.lastgroup for m in KEYWORD_PATTERN.finditer(normalize_utterance(text))}
+    return next((intent for intent in KEYWORD_PRIORITY if intent in found), OTHER)
+
+
+# ---------------- ROUTER ----------------
+class IntentRouter:
+    def __init__(self, max_entries=INTENT_CACHE_MAX_ENTRIES, min_similarity=INTENT_MIN_SIMILARITY):
+        self.min_similarity = min_similarity
+        self._cache = LRUCache(max_entries)
+        self._lock = threading.Lock()
+        self._labels = None
+        self._centroids = None
+
+    def _ensure_centroids(self):
+        if self._centroids is not None:
+            return
+
+        import numpy as np
+
+        with self._lock:
+            if self._centroids is not None:
+                return
+
+            labels = list(EXAMPLES)
+            vectors = encode(text for label in labels for text in EXAMPLES[label])
+
+            centroids, start = [], 0
+            for label in labels:
+                end = start + len(EXAMPLES[label])
+                centroid = vectors[start:end].mean(axis=0)
+                centroids.append(centroid / (np.linalg.norm(centroid) or 1.0))
+                start = end
+
+            self._labels = labels
+            self._centroids = np.vstack(centroids).astype("float32")
+
+    def _use_model(self):
+        if INTENT_ROUTER == "keywords":
+            return False
+        # "auto" never loads torch just to route a message
+        return INTENT_ROUTER == "embedding" or is_loaded("embedding_model")
+
+    def classify(self, text):
+        key = normalize_utterance(text)
+
+        intent = self._cache.get(key)
+        if intent is not None:
+            return intent
+
+        if not self._use_model():
+            # Cheap enough to redo; not cached so the model takes over once loaded
+            return keyword_intent(key)
+
+        self._ensure_centroids()
+        scores = self._centroids @ encode([key])[0]
+        best = int(scores.argmax())
+
+        if scores[best] >= self.min_similarity:
+            intent = self._labels[best]
+        else:
+            intent = keyword_intent(key)
+
+        self._cache.put(key, intent)
+
+        return intent
+
+    def clear(self):
+        self._cache.clear()
+
+
+router = IntentRouter()
+
+
+# ---------------- PUBLIC API ----------------
+@timed("intent")
+def classify_intent(text):
+    """One of BOOK, LOOKUP, CANCEL, SERVICES, DOCTORS, HOURS, ADDRESS, OTHER."""
+    return router.classify(text)
+
+
+@timed("intent")
 def detect_intent(text):
-    text = text.lower()
-    for word in ["book", "appointment", "schedule", "consult", "visit"]:
-        if word in text:
-            return "booking"
-    return "general"
+    return "booking" if router.classify(text) == BOOK else "general"
 
 
+@timed("intent")
 def is_question(text):
-    text = text.lower()
-    question_words = [
-        "what", "which", "how", "when", "where",
-        "services", "timing", "hours", "address", "doctors"
-    ]
-    return "?" in text or any(w in text for w in question_words)
+    # Checked mid-booking, so it goes by form: answers such as "Skin Treatment"
+    # or "Howard" must be taken as answers, not routed to the documents
+    text = normalize_utterance(text)
+    return "?" in text or bool(QUESTION_START.match(text)) or bool(INFO_WORDS.search(text))
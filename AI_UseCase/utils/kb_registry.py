@@ -0,0 +1,125 @@
+import os
+import json
+import threading
+
+from config.config import RAG_CACHE_DIR, KB_REGISTRY_MAX_ENTRIES
+from utils.rag_cache import load_rag_data
+from utils.answer_cache import answer_cache
+from utils.lru import LRUCache
+
+ALIASES_FILE = "aliases.json"
+
+
+class KnowledgeBaseRegistry:
+    """Process-wide store of rag_data, keyed by document set (cache_key).
+
+    Sessions keep only a key or an alias name in st.session_state and look
+    the knowledge base up on every run, so N sessions on the same PDFs share
+    one copy. Published rag_data is never mutated (updates build a new dict),
+    which makes lock-free reads of a returned reference safe; the lock only
+    guards the aliases and in-progress builds. Aliases such as "clinic" point
+    to a key and can be swapped atomically while sessions are reading.
+    """
+
+    def __init__(self, max_entries=KB_REGISTRY_MAX_ENTRIES, cache_dir=None):
+        self.cache_dir = cache_dir or RAG_CACHE_DIR
+        # Evicted entries are still on disk and reload on the next get()
+        self._entries = LRUCache(max_entries, on_evict=lambda key, _: answer_cache.invalidate_kb(key))
+        self._aliases = None
+        self._building = {}
+        self._lock = threading.Lock()
+
+    # ---------------- ENTRIES ----------------
+    def publish(self, rag_data):
+        key = rag_data["cache_key"]
+        self._entries.put(key, rag_data)
+        return key
+
+    def get(self, name):
+        """rag_data for a cache key or alias, or None if unknown."""
+        if name is None:
+            return None
+
+        with self._lock:
+            key = self._resolve(name)
+
+        rag_data = self._entries.get(key)
+        if rag_data is not None:
+            return rag_data
+
+        return self.get_or_build(key, lambda: load_rag_data(key, self.cache_dir))
+
+    def get_or_build(self, key, build):
+        """Shared rag_data for ``key``; concurrent callers wait for one build."""
+        rag_data = self._entries.peek(key)
+        if rag_data is not None:
+            return rag_data
+
+        with self._lock:
+            key_lock = self._building.setdefault(key, threading.Lock())
+
+        with key_lock:
+            rag_data = self._entries.peek(key)
+            if rag_data is None:
+                rag_data = build()
+                if rag_data is not None:
+                    self._entries.put(key, rag_data)
+
+        with self._lock:
+            self._building.pop(key, None)
+        return rag_data
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ---------------- ALIASES ----------------
+    def _aliases_path(self):
+        return os.path.join(self.cache_dir, ALIASES_FILE)
+
+    def _load_aliases(self):
+        if self._aliases is None:
+            try:
+                with open(self._aliases_path(), "r", encoding="utf-8") as f:
+                    self._aliases = json.load(f)
+            except (OSError, ValueError):
+                self._aliases = {}
+        return self._aliases
+
+    def _resolve(self, name):
+        return self._load_aliases().get(name, name)
+
+    def set_alias(self, alias, rag_data):
+        """Point ``alias`` at a new version; readers switch on their next get()."""
+        key = self.publish(rag_data)
+
+        with self._lock:
+            aliases = dict(self._load_aliases())
+            previous = aliases.get(alias)
+            aliases[alias] = key
+            self._aliases = aliases
+
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp = self._aliases_path() + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(aliases, f)
+                os.replace(tmp, self._aliases_path())
+            except OSError as e:
+                print("KB ALIAS SAVE ERROR:", e)
+
+        # Sessions on the alias move to the new version; its old answers go unused
+        if previous and previous != key:
+            answer_cache.invalidate_kb(previous)
+
+        return key
+
+    def alias_key(self, alias):
+        with self._lock:
+            return self._load_aliases().get(alias)
+
+
+registry = KnowledgeBaseRegistry()
+
+
+def get_knowledge_base(name):
+    return registry.get(name)
@@ -0,0 +1,92 @@
+"""Thread-safe bounded LRU shared by the process-wide caches.
+
+Lookups, inserts, evictions and the hit / miss counters all happen under
+one lock, so stats() is consistent with what get() returned.
+"""
+import time
+import threading
+from collections import Counter, OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """At most ``max_entries`` values, least recently used evicted first.
+
+    ``ttl_seconds`` makes entries expire; ``on_evict(key, value)`` is
+    called (outside the lock) for every entry pushed out by size.
+    """
+
+    def __init__(self, max_entries, ttl_seconds=None, on_evict=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires = entry
+        if expires is not None and expires <= time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        """Value for key (counted as a hit), or default (counted as a miss)."""
+        with self._lock:
+            value = self._lookup(key)
+            self._counts["misses" if value is _MISSING else "hits"] += 1
+        return default if value is _MISSING else value
+
+    def peek(self, key, default=None):
+        """Like get(), but not counted; the caller records its own outcome."""
+        with self._lock:
+            value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        evicted = []
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                old_key, (old_value, _) = self._entries.popitem(last=False)
+                evicted.append((old_key, old_value))
+
+        if self.on_evict:
+            for old_key, old_value in evicted:
+                self.on_evict(old_key, old_value)
+
+    def remove_where(self, predicate):
+        """Drop every entry whose key matches; not reported to on_evict."""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def record(self, event):
+        """Count a cache-specific outcome (e.g. "refreshes") for stats()."""
+        with self._lock:
+            self._counts[event] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            stats = {"entries": len(self._entries), "hits": 0, "misses": 0}
+            stats.update(self._counts)
+            return stats
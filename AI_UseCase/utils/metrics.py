@@ -0,0 +1,317 @@
+"""In-process latency metrics and per-turn traces.
+
+    with turn("chat"):              # one chat turn: trace + optional profile
+        with span("retrieve"):      # any stage inside it
+            ...
+
+    @timed("db.write")              # or wrap a whole function
+    def save_booking(...): ...
+
+Every span feeds a histogram (clinic_span_duration_seconds{span=...})
+exported in Prometheus text format by prometheus_text(), on the Admin page
+and, with METRICS_PORT set, at http://METRICS_HOST:<port>/metrics. Finished
+turns are appended to METRICS_TRACE_LOG as JSON lines. Turns slower than
+METRICS_SLOW_TURN_MS keep a cProfile dump in METRICS_PROFILE_DIR.
+"""
+import os
+import json
+import time
+import uuid
+import bisect
+import cProfile
+import threading
+import contextvars
+import functools
+from contextlib import contextmanager
+from datetime import datetime
+
+from config.config import (
+    METRICS_ENABLED,
+    METRICS_TRACE_LOG,
+    METRICS_SLOW_TURN_MS,
+    METRICS_PROFILE_DIR,
+    METRICS_PORT,
+    METRICS_HOST
+)
+
+# Seconds; spans range from microsecond intent checks to multi-second ingests
+BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+
+# ---------------- HISTOGRAMS ----------------
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+
+    def observe(self, seconds, error=False):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        self.errors += error
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding quantile q (None if empty)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + [float("inf")], self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, error=False):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds, error)
+
+    def snapshot(self):
+        """[{span, count, errors, mean_ms, p50_ms, p95_ms}] sorted by total time."""
+        with self._lock:
+            rows = [
+                {
+                    "span": name,
+                    "count": h.count,
+                    "errors": h.errors,
+                    "total_s": h.sum,
+                    "mean_ms": h.sum / h.count * 1000,
+                    "p50_ms": h.quantile(0.5) * 1000,
+                    "p95_ms": h.quantile(0.95) * 1000,
+                }
+                for name, h in self._histograms.items() if h.count
+            ]
+        return sorted(rows, key=lambda row: -row["total_s"])
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP clinic_span_duration_seconds Time spent per stage of the assistant.",
+            "# TYPE clinic_span_duration_seconds histogram",
+        ]
+        errors = [
+            "# HELP clinic_span_errors_total Stages that raised an exception.",
+            "# TYPE clinic_span_errors_total counter",
+        ]
+
+        with self._lock:
+            for name in sorted(self._histograms):
+                h = self._histograms[name]
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                cumulative = 0
+                for bound, n in zip(h.buckets, h.counts):
+                    cumulative += n
+                    lines.append(f'clinic_span_duration_seconds_bucket{{span="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'clinic_span_duration_seconds_bucket{{span="{label}",le="+Inf"}} {h.count}')
+                lines.append(f'clinic_span_duration_seconds_sum{{span="{label}"}} {h.sum:.6f}')
+                lines.append(f'clinic_span_duration_seconds_count{{span="{label}"}} {h.count}')
+                errors.append(f'clinic_span_errors_total{{span="{label}"}} {h.errors}')
+
+        return "\n".join(lines + errors) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+metrics = MetricsRegistry()
+
+
+# ---------------- SPANS & TRACES ----------------
+# The turn being traced in this thread / context, if any
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class _Trace:
+    def __init__(self, name, attrs):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = dict(attrs)
+        self.start = time.perf_counter()
+        self.spans = []
+        self.stack = []
+
+
+@contextmanager
+def span(name, **attrs):
+    if not METRICS_ENABLED:
+        yield
+        return
+
+    trace = _current_trace.get()
+    record = None
+    if trace is not None:
+        record = {
+            "name": name,
+            "parent": trace.stack[-1] if trace.stack else None,
+            "start_ms": (time.perf_counter() - trace.start) * 1000,
+        }
+        if attrs:
+            record["attrs"] = attrs
+        trace.spans.append(record)
+        trace.stack.append(len(trace.spans) - 1)
+
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe(name, elapsed, error)
+        if record is not None:
+            trace.stack.pop()
+            record["duration_ms"] = elapsed * 1000
+            if error:
+                record["error"] = True
+
+
+def timed(name):
+    """Decorator: run the function inside span(name)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def annotate(**attrs):
+    """Attach attributes (e.g. the chat branch taken) to the current turn."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attrs.update(attrs)
+
+
+def _start_profiler():
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active in this thread
+        return None
+    return profiler
+
+
+def _write_trace(line):
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(METRICS_TRACE_LOG)), exist_ok=True)
+        with open(METRICS_TRACE_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line) + "\n")
+    except Exception as e:
+        print("METRICS ERROR:", e)
+
+
+def _save_profile(profiler, trace, elapsed_ms):
+    try:
+        os.makedirs(METRICS_PROFILE_DIR, exist_ok=True)
+        path = os.path.join(METRICS_PROFILE_DIR, f"{trace.name}-{trace.id}-{elapsed_ms:.0f}ms.prof")
+        profiler.dump_stats(path)
+        return path
+    except Exception as e:
+        print("METRICS ERROR:", e)
+        return None
+
+
+@contextmanager
+def turn(name, **attrs):
+    """Trace one unit of work (a chat turn) with the spans run inside it."""
+    if not METRICS_ENABLED or _current_trace.get() is not None:
+        yield
+        return
+
+    trace = _Trace(name, attrs)
+    token = _current_trace.set(trace)
+    profiler = _start_profiler() if METRICS_SLOW_TURN_MS > 0 else None
+
+    try:
+        with span("turn." + name):
+            yield trace
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        _current_trace.reset(token)
+
+        elapsed_ms = (time.perf_counter() - trace.start) * 1000
+        profile = None
+        if profiler is not None and elapsed_ms >= METRICS_SLOW_TURN_MS:
+            profile = _save_profile(profiler, trace, elapsed_ms)
+            print(f"SLOW TURN: {name} took {elapsed_ms:.0f}ms, profile in {profile}")
+
+        if METRICS_TRACE_LOG:
+            _write_trace({
+                "trace_id": trace.id,
+                "name": name,
+                "timestamp": datetime.now().isoformat(),
+                "duration_ms": elapsed_ms,
+                "attrs": trace.attrs,
+                "spans": trace.spans,
+                "profile": profile,
+            })
+
+
+# ---------------- EXPORT ----------------
+def prometheus_text():
+    return metrics.prometheus_text()
+
+
+_server = None
+_server_failed = False
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serve /metrics on a daemon thread.
+
+    No-op when port is 0, already serving, or an earlier bind failed.
+    """
+    global _server, _server_failed
+
+    if not port:
+        return None
+
+    with _server_lock:
+        if _server is not None or _server_failed:
+            return _server
+
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            # Another Streamlit process already serves the port; reruns don't retry
+            print("METRICS ERROR:", e)
+            _server_failed = True
+            return None
+
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
@@ -0,0 +1,193 @@
+import threading
+from datetime import datetime, timedelta
+
+from config.config import (
+    OUTBOX_POLL_SECONDS,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_BACKOFF_BASE_SECONDS
+)
+from db.database import get_connection, transaction
+
+PENDING = "PENDING"
+SENDING = "SENDING"
+SENT = "SENT"
+FAILED = "FAILED"
+
+# A SENDING row older than this belongs to a worker that died mid-send
+STALE_CLAIM_SECONDS = 300
+
+
+# ---------------- ENQUEUE ----------------
+def enqueue_email(cur, booking_id, to_email, subject, body):
+    """Add a message using the caller's cursor, inside the caller's transaction."""
+    now = datetime.now().isoformat()
+    cur.execute(
+        """
+        INSERT INTO email_outbox
+            (booking_id, to_email, subject, body, status, attempts, next_attempt_at, created_at)
+        VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+        """,
+        (booking_id, to_email, subject, body, PENDING, now, now)
+    )
+
+
+def get_email_status(booking_id):
+    cur = get_connection().cursor()
+    cur.execute(
+        "SELECT status, attempts, last_error FROM email_outbox WHERE booking_id = ? ORDER BY id DESC",
+        (booking_id,)
+    )
+    return cur.fetchone()
+
+
+# ---------------- DRAIN ----------------
+def backoff_seconds(attempts):
+    return OUTBOX_BACKOFF_BASE_SECONDS * (2 ** (attempts - 1))
+
+
+def _claim_due(limit):
+    now = datetime.now()
+    stale = (now - timedelta(seconds=STALE_CLAIM_SECONDS)).isoformat()
+
+    with transaction() as conn:
+        claimed = _claim_rows(conn.cursor(), now, stale, limit)
+
+    if not claimed:
+        return []
+
+    cur = get_connection().cursor()
+    cur.execute(
+        f"SELECT id, to_email, subject, body, attempts FROM email_outbox "
+        f"WHERE id IN ({','.join('?' * len(claimed))})",
+        claimed
+    )
+    return cur.fetchall()
+
+
+def _claim_rows(cur, now, stale, limit):
+
+    cur.execute(
+        """
+        SELECT id FROM email_outbox
+        WHERE (status = ? AND next_attempt_at <= ?)
+           OR (status = ? AND next_attempt_at <= ?)
+        ORDER BY id
+        LIMIT ?
+        """,
+        (PENDING, now.isoformat(), SENDING, stale, limit)
+    )
+    ids = [row[0] for row in cur.fetchall()]
+
+    claimed = []
+    for message_id in ids:
+        # Conditional update: only one worker (or process) wins each row
+        cur.execute(
+            """
+            UPDATE email_outbox SET status = ?, next_attempt_at = ?
+            WHERE id = ?
+              AND ((status = ? AND next_attempt_at <= ?) OR (status = ? AND next_attempt_at <= ?))
+            """,
+            (SENDING, now.isoformat(), message_id, PENDING, now.isoformat(), SENDING, stale)
+        )
+        if cur.rowcount == 1:
+            claimed.append(message_id)
+
+    return claimed
+
+
+def drain_outbox(send, limit=50):
+    """Send due messages once with ``send(to_email, subject, body)``.
+
+    Returns (sent, failed) counts for this pass.
+    """
+    sent = failed = 0
+
+    for message_id, to_email, subject, body, attempts in _claim_due(limit):
+        attempts += 1
+        try:
+            send(to_email, subject, body)
+            status, next_at, error = SENT, None, None
+            sent += 1
+
+        except Exception as e:
+            print("❌ Email failed:", e)
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                status, next_at = FAILED, None
+            else:
+                status = PENDING
+                next_at = (datetime.now() + timedelta(seconds=backoff_seconds(attempts))).isoformat()
+            error = str(e)
+            failed += 1
+
+        with transaction() as conn:
+            conn.execute(
+                "UPDATE email_outbox SET status = ?, attempts = ?, next_attempt_at = ?, "
+                "last_error = ?, sent_at = ? WHERE id = ?",
+                (
+                    status, attempts, next_at, error,
+                    datetime.now().isoformat() if status == SENT else None,
+                    message_id
+                )
+            )
+
+    return sent, failed
+
+
+# ---------------- BACKGROUND WORKER ----------------
+class OutboxWorker:
+    """Daemon thread that drains the outbox through one pooled SMTP sender."""
+
+    def __init__(self, send=None, poll_seconds=OUTBOX_POLL_SECONDS):
+        self.send = send
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _send(self, to_email, subject, body):
+        if self.send is not None:
+            return self.send(to_email, subject, body)
+        from utils.emailer import send_email
+        return send_email(to_email, subject, body)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                drain_outbox(self._send)
+            except Exception as e:
+                print("OUTBOX ERROR:", e)
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+            self._thread.start()
+        return self
+
+    def notify(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_outbox_worker():
+    """Start the process-wide worker once; safe to call on every rerun."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = OutboxWorker().start()
+        return _worker
+
+
+def notify_outbox():
+    if _worker is not None:
+        _worker.notify()
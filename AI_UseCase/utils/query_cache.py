@@ -0,0 +1,97 @@
+"""Read-query cache keyed to the bookings change log.
+
+Triggers (migration 6) append to booking_changes on every booking write,
+so the log's sequence number is a write version. While it stays put,
+cached results are served without touching the bookings tables; when it
+moves, an entry's refresh function is handed only the bookings changed
+since that entry was computed.
+"""
+from config.config import ADMIN_QUERY_CACHE_MAX_ENTRIES
+from db.database import get_connection, transaction
+from utils.lru import LRUCache
+
+
+# ---------------- CHANGE LOG ----------------
+def current_version(path=None):
+    # sqlite_sequence keeps counting after old log rows are pruned
+    row = get_connection(path).execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'booking_changes'"
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def changes_since(version, path=None):
+    """{booking_id: (old_exists, old_type, old_date, old_status)} as of version.
+
+    Returns None when the log no longer reaches back that far.
+    """
+    conn = get_connection(path)
+
+    oldest = conn.execute("SELECT MIN(version) FROM booking_changes").fetchone()[0]
+    if oldest is None:
+        # Everything was pruned: only "nothing changed" is still knowable
+        return {} if version >= current_version(path) else None
+    if oldest > version + 1:
+        return None
+
+    rows = conn.execute(
+        """
+        SELECT booking_id, old_exists, old_type, old_date, old_status
+        FROM booking_changes WHERE version > ? ORDER BY version
+        """,
+        (version,)
+    ).fetchall()
+
+    # The first change after version holds the state the caller last saw
+    changes = {}
+    for booking_id, *old in rows:
+        changes.setdefault(booking_id, tuple(old))
+    return changes
+
+
+# ---------------- CACHE ----------------
+class VersionedQueryCache:
+    def __init__(self, max_entries=ADMIN_QUERY_CACHE_MAX_ENTRIES):
+        self._entries = LRUCache(max_entries)
+
+    def get(self, key, compute, refresh=None):
+        """Cached value for key.
+
+        refresh(old_value, changes) patches a stale value from the
+        changes_since() delta, or returns None to fall back to compute().
+        """
+        # One read transaction: the version, the delta and the recomputed
+        # value all come from the same WAL snapshot. Read separately, a write
+        # committed in between would be in the value and then applied again.
+        with transaction(immediate=False):
+            version = current_version()
+
+            # A stored entry only counts as a hit if its version is current
+            entry = self._entries.peek(key)
+
+            if entry and entry[0] == version:
+                self._entries.record("hits")
+                return entry[1]
+
+            value = None
+            if entry and refresh:
+                changes = changes_since(entry[0])
+                if changes is not None:
+                    value = refresh(entry[1], changes)
+
+            if value is None:
+                self._entries.record("misses")
+                value = compute()
+            else:
+                self._entries.record("refreshes")
+
+        self._entries.put(key, (version, value))
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        stats = self._entries.stats()
+        stats.setdefault("refreshes", 0)
+        return stats
@@ -1,97 +1,524 @@
-import os
-import tempfile
+import io
 import re
-import numpy as np
-import faiss
-from pypdf import PdfReader
-from sentence_transformers import SentenceTransformer
-
-# -------------------------------------------------
-# Local embedding model (NO API, FREE)
-# -------------------------------------------------
-embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+
+from config.config import (
+    RAG_TOP_K,
+    RAG_SIMILARITY_THRESHOLD,
+    PDF_EXTRACT_WORKERS,
+    PDF_PARALLEL_MIN_PAGES
+)
+from models.embeddings import encode_cached, embed_query, embedding_cache, get_faiss, get_pdf_reader
+from utils.vector_index import build_index, copy_index, removes_by_range, stored_vectors
+from utils.kb_registry import registry
+from utils.metrics import span, timed
+from utils.answer_cache import answer_cache
+from models.llm import get_llm_client
+from utils.rag_cache import (
+    file_digest,
+    cache_key_from_digests,
+    load_rag_data,
+    save_rag_data
+)
 
 
 # -------------------------------------------------
 # PDF TEXT EXTRACTION
 # -------------------------------------------------
-def extract_text_from_pdfs(uploaded_files):
-    texts = []
+def _file_bytes(file):
+    # Streamlit's UploadedFile is a BytesIO: getvalue() leaves the position alone
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    file.seek(0)
+    data = file.read()
+    file.seek(0)
+    return data
+
+
+# The PDF being extracted, parsed once per worker process
+_worker_reader = None
+
+
+def _init_worker(data):
+    global _worker_reader
+    _worker_reader = get_pdf_reader()(io.BytesIO(data))
+
+
+def _extract_page_range(bounds):
+    start, stop = bounds
+    return [_worker_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def extract_pages(data, workers=PDF_EXTRACT_WORKERS):
+    """Page texts of one PDF (in page order), read straight from memory."""
+    reader = get_pdf_reader()(io.BytesIO(data))
+    page_count = len(reader.pages)
+
+    if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        return [page.extract_text() or "" for page in reader.pages]
+
+    # Contiguous page ranges, a few per worker so slow pages even out
+    step = max(1, -(-page_count // (workers * 4)))
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+
+    # Spawned, not forked: the Streamlit process is multi-threaded and may
+    # hold torch locks. The bytes go to each worker once, via the initializer.
+    pages = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(data,)
+    ) as pool:
+        for texts in pool.map(_extract_page_range, ranges):
+            pages.extend(texts)
+    return pages
 
-    for file in uploaded_files:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(file.read())
-            path = tmp.name
 
-        try:
-            reader = PdfReader(path)
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    texts.append(text)
-        finally:
-            os.remove(path)
+def read_uploads(uploaded_files):
+    """[(name, bytes, sha256)] for each uploaded PDF."""
+    uploads = []
 
-    return texts
+    for i, file in enumerate(uploaded_files):
+        data = _file_bytes(file)
+        name = getattr(file, "name", None) or f"document-{i + 1}"
+        uploads.append((name, data, file_digest(data)))
+
+    return uploads
+
+
+@timed("extract")
+def extract_document(name, data, digest=None, workers=PDF_EXTRACT_WORKERS):
+    """One PDF as {"name", "sha256", "text"}; pages are joined so chunks can span them."""
+    pages = extract_pages(data, workers)
+    return {
+        "name": name,
+        "sha256": digest or file_digest(data),
+        "text": normalize_text("\n".join(p for p in pages if p)).strip()
+    }
 
 
 # -------------------------------------------------
 # CHUNKING
 # -------------------------------------------------
-def chunk_text(texts, chunk_size=500, overlap=50):
-    chunks = []
-    for text in texts:
-        start = 0
-        while start < len(text):
-            chunks.append(text[start:start + chunk_size])
-            start += chunk_size - overlap
-    return chunks
+# Chunks are (doc, start, end) offsets into rag_data["full_text"];
+# the text itself is only sliced out when it is embedded or shown.
+SECTION_HEADINGS = [
+    "Services Available", "Doctor Details", "Working Hours",
+    "Contact Information", "Facilities Available", "Appointment Rules",
+    "Address", "Notes"
+]
+
+HEADING_PATTERN = re.compile(
+    r"\s+(?=(?:" + "|".join(re.escape(h) for h in SECTION_HEADINGS) + r")\b)"
+)
+
+# Sentence ends (not "Dr." or an initial like "R."), bullets and doctor entries
+SEGMENT_PATTERN = re.compile(
+    r"(?<!\bDr\.)(?<!\b[A-Z]\.)(?<=[.!?])\s+"
+    r"|\s+(?=•)"
+    r"|\s+(?=Dr\.\s)"
+)
+
+
+def _segments(text, start, end):
+    """(start, end, is_heading) spans of sentences / bullets / sections."""
+    pos = start
+    breaks = []
+
+    for m in HEADING_PATTERN.finditer(text, start, end):
+        breaks.append((m.start(), m.end(), True))
+    for m in SEGMENT_PATTERN.finditer(text, start, end):
+        breaks.append((m.start(), m.end(), False))
+
+    heading = False
+    for b_start, b_end, is_heading in sorted(breaks):
+        if b_start < pos:
+            heading = heading or is_heading
+            continue
+        if b_start > pos:
+            yield pos, b_start, heading
+        pos = b_end
+        heading = is_heading
+
+    if pos < end:
+        yield pos, end, heading
+
+
+def _split_long(text, start, end, max_chars):
+    # A single sentence longer than a chunk: cut at the last space that fits
+    while end - start > max_chars:
+        cut = text.rfind(" ", start, start + max_chars)
+        if cut <= start:
+            cut = start + max_chars
+        yield start, cut
+        start = cut + 1 if text[cut:cut + 1] == " " else cut
+    if start < end:
+        yield start, end
+
+
+def iter_chunks(text, documents, max_chars=500, min_chars=150):
+    """Lazily yield (doc, start, end) chunks of ``text``.
+
+    Chunks never cross a document, are built from whole sentences / bullets,
+    and a section heading starts a new chunk once the current one holds
+    at least ``min_chars``.
+    """
+    for doc, (doc_start, doc_end) in enumerate(documents):
+        chunk_start = chunk_end = None
+
+        for seg_start, seg_end, heading in _segments(text, doc_start, doc_end):
+            if chunk_start is not None and (
+                seg_end - chunk_start > max_chars
+                or (heading and chunk_end - chunk_start >= min_chars)
+            ):
+                yield doc, chunk_start, chunk_end
+                chunk_start = None
+
+            if seg_end - seg_start > max_chars:
+                for piece_start, piece_end in _split_long(text, seg_start, seg_end, max_chars):
+                    yield doc, piece_start, piece_end
+                continue
+
+            if chunk_start is None:
+                chunk_start = seg_start
+            chunk_end = seg_end
+
+        if chunk_start is not None:
+            yield doc, chunk_start, chunk_end
+
+
+def chunk_text_at(rag_data, i):
+    _, start, end = rag_data["chunks"][i]
+    return rag_data["full_text"][start:end]
+
+
+def iter_chunk_texts(rag_data, chunks=None):
+    text = rag_data["full_text"]
+    for _, start, end in (rag_data["chunks"] if chunks is None else chunks):
+        yield text[start:end]
 
 
 # -------------------------------------------------
-# PROCESS PDFs
+# STRUCTURED FACTS (extracted once per ingest)
 # -------------------------------------------------
-def process_pdfs(uploaded_files):
-    texts = extract_text_from_pdfs(uploaded_files)
-    chunks = chunk_text(texts)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+SERVICES_BLOCK_PATTERN = re.compile(
+    r"Services Available[:\-]?(.*?)(Doctor|Working|Contact|Appointment|$)",
+    re.IGNORECASE | re.DOTALL
+)
+SERVICE_ITEM_PATTERN = re.compile(r"[•\-]\s*([A-Za-z\s]+)")
+
+DOCTOR_PATTERN = re.compile(
+    r"(Dr\.\s[A-Za-z.\s]+).*?"
+    r"Specialization:\s*([A-Za-z\s]+).*?"
+    r"Consultation Time:\s*([0-9:AMPamp\s–\-]+)",
+    re.IGNORECASE | re.DOTALL
+)
+
+HOURS_PATTERN = re.compile(
+    r"Monday to Saturday.*?([0-9:AMPamp\s–\-]+)",
+    re.IGNORECASE | re.DOTALL
+)
+
+ADDRESS_PATTERN = re.compile(
+    r"Address[:\-]?(.*?)(Working|Contact|$)",
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def normalize_text(text):
+    return WHITESPACE_PATTERN.sub(" ", text)
+
+
+def extract_facts(clean_text):
+    """Run every extractor once over the normalized document text."""
+    services = []
+    match = SERVICES_BLOCK_PATTERN.search(clean_text)
+    if match:
+        services = [s.strip() for s in SERVICE_ITEM_PATTERN.findall(match.group(1))]
+
+    doctors = [
+        {
+            "name": name.strip(),
+            "specialization": spec.strip(),
+            "consultation_time": time.strip()
+        }
+        for name, spec, time in DOCTOR_PATTERN.findall(clean_text)
+    ]
+
+    match = HOURS_PATTERN.search(clean_text)
+    hours = match.group(1).strip() if match else None
+
+    match = ADDRESS_PATTERN.search(clean_text)
+    address = match.group(1).strip() if match else None
+
+    return {
+        "services": services,
+        "doctors": doctors,
+        "hours": hours,
+        "address": address
+    }
+
 
-    embeddings = embedding_model.encode(chunks)
-    index = faiss.IndexFlatL2(embeddings.shape[1])
-    index.add(np.array(embeddings).astype("float32"))
+def get_facts(rag_data):
+    # rag_data built before facts existed: extract once and keep them
+    if "facts" not in rag_data:
+        rag_data["facts"] = extract_facts(normalize_text(rag_data["full_text"]))
+    return rag_data["facts"]
 
+
+# -------------------------------------------------
+# PROCESS PDFs
+# -------------------------------------------------
+def _assemble(documents, full_text, chunks, index):
+    # Every update produces a new dict: sessions holding the old one are unaffected
     return {
+        "documents": documents,
         "chunks": chunks,
+        "full_text": full_text,
+        "facts": extract_facts(full_text),
         "index": index,
-        "full_text": "\n".join(texts)
+        "cache_key": cache_key_from_digests(d["sha256"] for d in documents)
     }
 
 
+@timed("index")
+def build_rag_data(documents):
+    """rag_data for [{"name", "sha256", "text"}] documents."""
+    # One shared, whitespace-normalized buffer; documents are spans into it
+    spans = []
+    offset = 0
+    for doc in documents:
+        spans.append((offset, offset + len(doc["text"])))
+        offset += len(doc["text"]) + 1
+
+    full_text = "\n".join(doc["text"] for doc in documents)
+    chunks = list(iter_chunks(full_text, spans))
+
+    index = build_index(encode_cached(full_text[s:e] for _, s, e in chunks))
+
+    return _assemble(
+        [
+            {"name": doc["name"], "sha256": doc["sha256"], "start": start, "end": end}
+            for doc, (start, end) in zip(documents, spans)
+        ],
+        full_text,
+        chunks,
+        index
+    )
+
+
+@timed("ingest")
+def process_pdfs(uploaded_files):
+    """Shared rag_data for the uploaded PDFs (one copy per process)."""
+    uploads = read_uploads(uploaded_files)
+
+    # Same PDF bytes -> same chunks and index, so reuse them from memory or disk
+    cache_key = cache_key_from_digests(digest for _, _, digest in uploads)
+
+    def build():
+        cached = load_rag_data(cache_key)
+        if cached is not None:
+            return cached
+
+        rag_data = build_rag_data([
+            extract_document(name, data, digest) for name, data, digest in uploads
+        ])
+
+        save_rag_data(cache_key, rag_data)
+        return rag_data
+
+    return registry.get_or_build(cache_key, build)
+
+
+# -------------------------------------------------
+# INCREMENTAL UPDATES
+# -------------------------------------------------
+def _chunk_range(rag_data, doc):
+    ids = [i for i, c in enumerate(rag_data["chunks"]) if c[0] == doc]
+    return (ids[0], ids[-1] + 1) if ids else (0, 0)
+
+
+def remove_document(rag_data, name):
+    """New rag_data without document ``name``; no re-embedding needed."""
+    documents = rag_data["documents"]
+    pos = next((i for i, d in enumerate(documents) if d["name"] == name), None)
+    if pos is None:
+        return rag_data
+
+    faiss = get_faiss()
+    text = rag_data["full_text"]
+    start, end = documents[pos]["start"], documents[pos]["end"]
+
+    # Drop the document and the "\n" that joins it to its neighbour
+    if pos + 1 < len(documents):
+        full_text = text[:start] + text[end + 1:]
+        shift = end + 1 - start
+    else:
+        full_text = text[:max(start - 1, 0)]
+        shift = 0
+
+    new_documents = [dict(d) for d in documents[:pos]]
+    for d in documents[pos + 1:]:
+        new_documents.append(dict(d, start=d["start"] - shift, end=d["end"] - shift))
+
+    chunks = []
+    for doc, s, e in rag_data["chunks"]:
+        if doc < pos:
+            chunks.append((doc, s, e))
+        elif doc > pos:
+            chunks.append((doc - 1, s - shift, e - shift))
+
+    first, last = _chunk_range(rag_data, pos)
+    if removes_by_range(rag_data["index"]):
+        # Flat / sq8 renumber the remaining vectors, matching the chunk list
+        index = copy_index(rag_data["index"])
+        if last > first:
+            index.remove_ids(faiss.IDSelectorRange(first, last))
+    else:
+        # IVF ids do not shift on removal: rebuild from the vectors it stores
+        vectors = stored_vectors(rag_data["index"])
+        if vectors is not None:
+            import numpy as np
+            index = build_index(np.vstack([vectors[:first], vectors[last:]]))
+        else:
+            index = build_index(encode_cached(full_text[s:e] for _, s, e in chunks))
+
+    return _assemble(new_documents, full_text, chunks, index)
+
+
+def _remember_vectors(rag_data, name):
+    # A replaced PDF mostly repeats its old chunks: seed the embedding cache
+    # from the index so they skip the model, even after a restart
+    pos = next((i for i, d in enumerate(rag_data["documents"]) if d["name"] == name), None)
+    if pos is None:
+        return
+
+    first, last = _chunk_range(rag_data, pos)
+    vectors = stored_vectors(rag_data["index"], first, last) if last > first else None
+    if vectors is None:
+        return
+
+    text = rag_data["full_text"]
+    for (_, s, e), vector in zip(rag_data["chunks"][first:last], vectors):
+        embedding_cache.put(embedding_cache.key(text[s:e]), vector)
+
+
+def add_document(rag_data, name, data, digest=None):
+    """New rag_data with the PDF added (or replaced, if ``name`` exists).
+
+    Only the new document is chunked; chunks already in the embedding
+    cache are not sent through the model again.
+    """
+    _remember_vectors(rag_data, name)
+    rag_data = remove_document(rag_data, name)
+    doc = extract_document(name, data, digest)
+
+    text = rag_data["full_text"]
+    start = len(text) + 1 if rag_data["documents"] else 0
+    full_text = (text + "\n" + doc["text"]) if rag_data["documents"] else doc["text"]
+    end = start + len(doc["text"])
+
+    pos = len(rag_data["documents"])
+    new_chunks = [(pos, s, e) for _, s, e in iter_chunks(full_text, [(start, end)])]
+
+    index = copy_index(rag_data["index"])
+    if new_chunks:
+        index.add(encode_cached(full_text[s:e] for _, s, e in new_chunks))
+
+    documents = [dict(d) for d in rag_data["documents"]]
+    documents.append({"name": name, "sha256": doc["sha256"], "start": start, "end": end})
+
+    return _assemble(documents, full_text, rag_data["chunks"] + new_chunks, index)
+
+
+def replace_document(rag_data, name, data, digest=None):
+    return add_document(rag_data, name, data, digest)
+
+
+@timed("ingest")
+def sync_documents(rag_data, uploaded_files):
+    """Bring rag_data in line with the uploader: add new or changed PDFs,
+    drop removed ones. Returns the same object when nothing changed."""
+    uploads = read_uploads(uploaded_files)
+    current = {d["name"]: d["sha256"] for d in rag_data.get("documents", [])}
+    updated = rag_data
+
+    for name, data, digest in uploads:
+        if current.get(name) != digest:
+            updated = add_document(updated, name, data, digest)
+
+    uploaded_names = {name for name, _, _ in uploads}
+    for name in current:
+        if name not in uploaded_names:
+            updated = remove_document(updated, name)
+
+    if updated is not rag_data:
+        save_rag_data(updated["cache_key"], updated)
+        registry.publish(updated)
+    return updated
+
+
+# -------------------------------------------------
+# SEMANTIC RETRIEVAL
+# -------------------------------------------------
+@timed("retrieve")
+def retrieve(query, rag_data, top_k=RAG_TOP_K, threshold=RAG_SIMILARITY_THRESHOLD):
+    """Top-k chunks for the query as [{"text", "score"}], best first.
+
+    Scores are cosine similarities; passages below ``threshold`` are dropped.
+    """
+    index = rag_data["index"]
+    if index.ntotal == 0:
+        return []
+
+    vector = embed_query(query).reshape(1, -1)
+    distances, ids = index.search(vector, min(top_k, index.ntotal))
+
+    passages = []
+    for dist, i in zip(distances[0], ids[0]):
+        if i < 0:
+            continue
+        # Squared L2 between unit vectors: d = 2 - 2 * cos
+        score = 1.0 - float(dist) / 2.0
+        if score >= threshold:
+            passages.append({"text": chunk_text_at(rag_data, i), "score": score})
+
+    return passages
+
+
 # -------------------------------------------------
 # RAG ANSWER (RULE-BASED, PDF-SAFE)
 # -------------------------------------------------
+SERVICE_KEYWORDS = ["service", "services", "what do u have", "what do you have"]
+DOCTOR_KEYWORDS = ["doctor", "doctors", "availability", "available"]
+HOURS_KEYWORDS = [
+    "working", "timing", "hours", "open", "day", "sunday", "monday",
+    "tuesday", "wednesday", "thursday", "friday", "saturday"
+]
+ADDRESS_KEYWORDS = ["address", "location"]
+
+
+@timed("answer")
 def get_rag_answer(query, rag_data):
-    q = query.lower().strip()
-    text = rag_data["full_text"]
+    # Same documents + same question = same answer, whichever session asks
+    return answer_cache.get_or_compute(
+        rag_data.get("cache_key"), query, lambda: _compute_answer(query, rag_data)
+    )
 
-    # Normalize whitespace
-    clean_text = re.sub(r"\s+", " ", text)
+
+def _compute_answer(query, rag_data):
+    q = query.lower().strip()
+    facts = get_facts(rag_data)
 
     # =================================================
     # SERVICES
     # =================================================
-    if any(k in q for k in ["service", "services", "what do u have", "what do you have"]):
-        services = []
-
-        service_pattern = re.compile(
-            r"Services Available[:\-]?(.*?)(Doctor|Working|Contact|Appointment|$)",
-            re.IGNORECASE | re.DOTALL
-        )
-
-        match = service_pattern.search(clean_text)
-        if match:
-            block = match.group(1)
-            for s in re.findall(r"[•\-]\s*([A-Za-z\s]+)", block):
-                services.append(s.strip())
+    if any(k in q for k in SERVICE_KEYWORDS):
+        services = facts["services"]
 
         if services:
             return "🩺 **Services Available:**\n" + "\n".join(f"- {s}" for s in services)
@@ -108,28 +535,13 @@ def get_rag_answer(query, rag_data):
     # =================================================
     # DOCTORS & AVAILABILITY (FIXED)
     # =================================================
-    if any(k in q for k in ["doctor", "doctors", "availability", "available"]):
-        doctors = []
-
-        pattern = re.compile(
-            r"(Dr\.\s[A-Za-z.\s]+).*?"
-            r"Specialization:\s*([A-Za-z\s]+).*?"
-            r"Consultation Time:\s*([0-9:AMPamp\s–\-]+)",
-            re.IGNORECASE | re.DOTALL
-        )
-
-        matches = pattern.findall(clean_text)
-
-        for m in matches:
-            name = m[0].strip()
-            spec = m[1].strip()
-            time = m[2].strip()
-            doctors.append((name, spec, time))
+    if any(k in q for k in DOCTOR_KEYWORDS):
+        doctors = facts["doctors"]
 
         if doctors:
             response = "👨‍⚕️ **Doctors & Availability:**\n"
             for d in doctors:
-                response += f"- {d[0]} – {d[1]} (⏰ {d[2]})\n"
+                response += f"- {d['name']} – {d['specialization']} (⏰ {d['consultation_time']})\n"
             return response.strip()
 
         return "Doctor details not found in clinic documents."
@@ -137,23 +549,16 @@ def get_rag_answer(query, rag_data):
     # =================================================
     # WORKING HOURS & DAYS
     # =================================================
-    if any(k in q for k in ["working", "timing", "hours", "open", "day", "sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]):
+    if any(k in q for k in HOURS_KEYWORDS):
 
         if "sunday" in q:
             return "❌ The clinic is **closed on Sundays**."
 
-        hours_pattern = re.compile(
-            r"Monday to Saturday.*?([0-9:AMPamp\s–\-]+)",
-            re.IGNORECASE | re.DOTALL
-        )
-
-        match = hours_pattern.search(clean_text)
-        if match:
-            time_range = match.group(1).strip()
+        if facts["hours"]:
             return (
                 "⏰ **Clinic Working Hours:**\n"
                 "- Monday to Saturday\n"
-                f"- {time_range}\n"
+                f"- {facts['hours']}\n"
                 "- ❌ Sunday: Closed"
             )
 
@@ -162,19 +567,54 @@ def get_rag_answer(query, rag_data):
     # =================================================
     # ADDRESS
     # =================================================
-    if any(k in q for k in ["address", "location"]):
-        addr_pattern = re.compile(
-            r"Address[:\-]?(.*?)(Working|Contact|$)",
-            re.IGNORECASE | re.DOTALL
-        )
-
-        match = addr_pattern.search(clean_text)
-        if match:
-            return "📍 **Clinic Address:**\n" + match.group(1).strip()
+    if any(k in q for k in ADDRESS_KEYWORDS):
+        if facts["address"]:
+            return "📍 **Clinic Address:**\n" + facts["address"]
 
         return "Address not found."
 
+    # =================================================
+    # SEMANTIC SEARCH
+    # =================================================
+    passages = retrieve(query, rag_data)
+    if passages:
+        response = "📄 **From the clinic documents:**\n"
+        for p in passages:
+            response += f"\n> {p['text']}\n\n_(relevance {p['score']:.2f})_\n"
+        return response.strip()
+
     # =================================================
     # FALLBACK
     # =================================================
     return "Sorry, I could not find that information in the clinic documents."
+
+
+# -------------------------------------------------
+# RAG ANSWER (GENERATIVE, STREAMED)
+# -------------------------------------------------
+def generate_rag_answer(query, rag_data):
+    """Iterator of answer tokens from the LLM grounded on the retrieved chunks.
+
+    None when nothing relevant was retrieved; callers fall back to
+    get_rag_answer() so the model is never asked without context.
+    """
+    passages = retrieve(query, rag_data)
+    if not passages:
+        return None
+    return _stream_answer(query, rag_data, [p["text"] for p in passages])
+
+
+def _stream_answer(query, rag_data, passages):
+    # A generator, so the "answer" span times the whole stream, not just its setup
+    started = False
+    try:
+        with span("answer"):
+            for piece in get_llm_client().stream_answer(query, passages):
+                started = True
+                yield piece
+    except Exception as e:
+        print("LLM ERROR:", e)
+        if started:
+            yield "\n\n⚠️ The answer was cut short. Please try again."
+        else:
+            yield get_rag_answer(query, rag_data)
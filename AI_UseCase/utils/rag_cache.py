@@ -0,0 +1,124 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+from config.config import RAG_CACHE_DIR, EMBEDDING_MODEL_NAME
+from models.embeddings import get_faiss
+from utils.vector_index import configure_index
+
+# Bump when the layout of a cache entry changes so old entries are ignored
+CACHE_FORMAT_VERSION = 5
+
+META_FILE = "meta.json"
+INDEX_FILE = "index.faiss"
+
+
+# -------------------------------------------------
+# CACHE KEY
+# -------------------------------------------------
+def file_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def cache_key_from_digests(digests):
+    """Key for a document set given each file's sha256 (in upload order)."""
+    h = hashlib.sha256()
+    h.update(f"v{CACHE_FORMAT_VERSION}:{EMBEDDING_MODEL_NAME}".encode("utf-8"))
+    for digest in digests:
+        h.update(bytes.fromhex(digest))
+    return h.hexdigest()
+
+
+def compute_cache_key(file_contents):
+    """Hash of the uploaded PDF bytes (in upload order) plus the embedding setup."""
+    return cache_key_from_digests(file_digest(data) for data in file_contents)
+
+
+def _entry_dir(key, cache_dir=None):
+    return os.path.join(cache_dir or RAG_CACHE_DIR, key)
+
+
+# -------------------------------------------------
+# LOAD
+# -------------------------------------------------
+def load_rag_data(key, cache_dir=None):
+    entry = _entry_dir(key, cache_dir)
+    meta_path = os.path.join(entry, META_FILE)
+    index_path = os.path.join(entry, INDEX_FILE)
+
+    if not (os.path.exists(meta_path) and os.path.exists(index_path)):
+        return None
+
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if meta.get("version") != CACHE_FORMAT_VERSION:
+            return None
+
+        # Flat and sq8 codes are mapped from the file (IO_FLAG_MMAP_IFC), so
+        # pages are shared with the OS cache and read on demand. The codes
+        # are a read-only view: updates go through vector_index.copy_index().
+        faiss = get_faiss()
+        index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP_IFC)
+
+        # IVF indexes are read into memory: the IFC flag does not cover
+        # their inverted lists, and plain IO_FLAG_MMAP lists cannot be updated
+        if faiss.try_extract_index_ivf(index) is not None:
+            index = faiss.read_index(index_path)
+
+        index = configure_index(index)
+
+        rag_data = meta["data"]
+        # JSON has no tuples: chunk offsets come back as lists
+        rag_data["chunks"] = [tuple(c) for c in rag_data["chunks"]]
+        rag_data["index"] = index
+        rag_data["cache_key"] = key
+        return rag_data
+
+    except Exception as e:
+        print("RAG CACHE LOAD ERROR:", e)
+        return None
+
+
+# -------------------------------------------------
+# SAVE
+# -------------------------------------------------
+def save_rag_data(key, rag_data, cache_dir=None):
+    root = cache_dir or RAG_CACHE_DIR
+    entry = _entry_dir(key, cache_dir)
+
+    if os.path.exists(entry):
+        return True
+
+    try:
+        os.makedirs(root, exist_ok=True)
+
+        # Write into a temp dir and rename it, so readers never see half an entry
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=root)
+
+        with open(os.path.join(tmp, META_FILE), "w", encoding="utf-8") as f:
+            # Everything except the index is plain JSON (chunks, full_text, facts)
+            json.dump({
+                "version": CACHE_FORMAT_VERSION,
+                "data": {
+                    k: v for k, v in rag_data.items()
+                    if k not in ("index", "cache_key")
+                }
+            }, f)
+
+        get_faiss().write_index(rag_data["index"], os.path.join(tmp, INDEX_FILE))
+
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # Another session stored the same documents first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        return True
+
+    except Exception as e:
+        print("RAG CACHE SAVE ERROR:", e)
+        return False
@@ -0,0 +1,192 @@
+import time
+
+from config.config import VECTOR_INDEX_MODE, VECTOR_INDEX_NPROBE, VECTOR_INDEX_REFINE_K
+from models.embeddings import get_faiss
+
+INDEX_MODES = ["flat", "sq8", "ivf", "ivfpq"]
+
+# "auto" thresholds (number of chunks). Measured with bench_index.py at 50k:
+# sq8 recall@5 0.973 at 2.5ms/query; ivfpq (with the sq8 re-rank) 0.952 at
+# 0.17ms. Raw IVF-PQ only reached 0.367, so ivfpq always re-ranks.
+SQ8_MIN_VECTORS = 5_000
+IVFPQ_MIN_VECTORS = 50_000
+
+# IVF / PQ training needs enough points per centroid
+MIN_TRAIN_PER_LIST = 39
+PQ_BITS = 8
+
+
+# -------------------------------------------------
+# MODE SELECTION
+# -------------------------------------------------
+def choose_index_mode(n_vectors):
+    if n_vectors < SQ8_MIN_VECTORS:
+        return "flat"
+    if n_vectors < IVFPQ_MIN_VECTORS:
+        return "sq8"
+    return "ivfpq"
+
+
+def _nlist(n_vectors):
+    # ~4 * sqrt(n) lists, but never more than the data can train
+    nlist = int(4 * n_vectors ** 0.5)
+    return max(1, min(nlist, n_vectors // MIN_TRAIN_PER_LIST))
+
+
+def _pq_subquantizers(dim):
+    # 8-bit codes over 8-dim sub-vectors: 384 floats -> 48 bytes
+    for m in (dim // 8, dim // 4, dim // 2, 1):
+        if m and dim % m == 0:
+            return m
+    return 1
+
+
+# -------------------------------------------------
+# BUILD
+# -------------------------------------------------
+def build_index(vectors, mode=VECTOR_INDEX_MODE):
+    """L2 index over unit-length float32 ``vectors`` in the given mode."""
+    faiss = get_faiss()
+    n, dim = vectors.shape
+
+    if mode == "auto":
+        mode = choose_index_mode(n)
+    if mode not in INDEX_MODES:
+        raise ValueError(f"Unknown vector index mode: {mode}")
+
+    # Too few vectors to train centroids / codebooks: exact search is cheap anyway
+    if mode in ("ivf", "ivfpq") and n < MIN_TRAIN_PER_LIST * 2:
+        mode = "flat"
+    if mode == "ivfpq" and n < 2 ** PQ_BITS * MIN_TRAIN_PER_LIST:
+        mode = "ivf"
+
+    if mode == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif mode == "sq8":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+    elif mode == "ivf":
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, _nlist(n))
+    else:
+        # PQ codes find candidates fast but coarsely; int8 vectors re-rank them
+        index = faiss.IndexRefine(
+            faiss.IndexIVFPQ(
+                faiss.IndexFlatL2(dim), dim, _nlist(n), _pq_subquantizers(dim), PQ_BITS
+            ),
+            faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+        )
+
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return configure_index(index)
+
+
+def configure_index(index):
+    """Apply search-time settings (lost or defaulted when an index is loaded)."""
+    faiss = get_faiss()
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(VECTOR_INDEX_NPROBE, ivf.nlist)
+    if isinstance(index, faiss.IndexRefine):
+        index.k_factor = VECTOR_INDEX_REFINE_K
+    return index
+
+
+def copy_index(index):
+    """Writable, in-memory copy. clone_index() would keep the codes of a
+    memory-mapped index as a read-only view, and adding to it aborts."""
+    faiss = get_faiss()
+    return configure_index(faiss.deserialize_index(faiss.serialize_index(index)))
+
+
+def removes_by_range(index):
+    """Flat and sq8 indexes renumber the remaining vectors on remove_ids()."""
+    return isinstance(index, get_faiss().IndexFlatCodes)
+
+
+def stored_vectors(index, start=0, stop=None):
+    """Vectors start..stop as the index holds them, so a rebuild needs no model.
+
+    Flat and IVF-flat give them back exactly, sq8 (also the ivfpq re-rank
+    store) to within its int8 rounding. None for PQ codes alone, which are
+    too coarse to rebuild from.
+    """
+    faiss = get_faiss()
+    stop = index.ntotal if stop is None else stop
+
+    if isinstance(index, faiss.IndexRefine):
+        index = faiss.downcast_index(index.refine_index)
+    if isinstance(index, faiss.IndexFlatCodes):
+        return index.reconstruct_n(start, stop - start)
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and isinstance(faiss.downcast_index(ivf), faiss.IndexIVFFlat):
+        # The direct map is built on a copy: the shared index stays untouched.
+        # ``copy`` must outlive ``ivf``, which points into it
+        copy = copy_index(index)
+        ivf = faiss.extract_index_ivf(copy)
+        ivf.make_direct_map()
+        return ivf.reconstruct_n(start, stop - start)
+    return None
+
+
+def index_mode(index):
+    faiss = get_faiss()
+    if isinstance(index, (faiss.IndexRefine, faiss.IndexIVFPQ)):
+        return "ivfpq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return "sq8"
+    return "flat"
+
+
+def index_size_bytes(index):
+    return len(get_faiss().serialize_index(index))
+
+
+# -------------------------------------------------
+# RECALL vs LATENCY REPORT
+# -------------------------------------------------
+def evaluate_index_modes(vectors, queries, k=5, modes=INDEX_MODES):
+    """Compare each mode with the exact index on the same data.
+
+    Returns one row per mode with recall@k (share of the exact top-k found),
+    mean search latency per query in ms, build time and serialized size.
+    """
+    exact = build_index(vectors, "flat")
+    _, truth = exact.search(queries, k)
+    truth_sets = [set(row) for row in truth]
+
+    report = []
+    for mode in modes:
+        start = time.perf_counter()
+        index = build_index(vectors, mode)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, found = index.search(queries, k)
+        search_seconds = time.perf_counter() - start
+
+        hits = sum(len(truth_sets[i] & set(row)) for i, row in enumerate(found))
+
+        report.append({
+            "mode": index_mode(index),
+            "requested_mode": mode,
+            "recall_at_k": hits / float(k * len(queries)),
+            "latency_ms": 1000.0 * search_seconds / len(queries),
+            "build_seconds": build_seconds,
+            "size_bytes": index_size_bytes(index)
+        })
+
+    return report
+
+
+def format_report(report):
+    lines = [f"{'mode':<8}{'recall@k':>10}{'ms/query':>10}{'build s':>10}{'size MiB':>10}"]
+    for row in report:
+        lines.append(
+            f"{row['mode']:<8}{row['recall_at_k']:>10.3f}{row['latency_ms']:>10.3f}"
+            f"{row['build_seconds']:>10.2f}{row['size_bytes'] / 2 ** 20:>10.2f}"
+        )
+    return "\n".join(lines)